@@ -0,0 +1,148 @@
+"""In-process harmonic map through the `bin/map` sources.
+
+`harmonic_map/src/HarmonicMapC.cpp` exposes CHarmonicMap over plain
+arrays, and the `harmonic_map` CMake target builds it, with the rest of
+the sources but main.cc, into `bin/libharmonic_map.so` (`.dylib` on
+macOS). The map is then computed on NumPy arrays in this process, with
+no .obj file written for `bin/map` to read and none read back:
+
+    uv = harmonic_map(vertices[:, :3], faces)
+
+"""
+import ctypes
+from pathlib import Path
+import sys
+from typing import Optional, Union
+
+import numpy as np
+
+LIBRARY_FPATH = (
+    Path(__file__).resolve().parent
+    / "bin"
+    / ("libharmonic_map.dylib" if sys.platform == "darwin" else "libharmonic_map.so")
+)
+
+# return codes of harmonic_map_uv, see HarmonicMapC.h
+_ERRORS = {
+    1: "Only topological disks accepted.",
+    2: "A face index is out of range.",
+}
+
+_library = None
+
+
+def load_library(fpath: Union[str, Path] = LIBRARY_FPATH) -> ctypes.CDLL:
+    """Load the shared library once and declare `harmonic_map_uv`.
+
+    Raises:
+        FileNotFoundError: when the library has not been built.
+    """
+    global _library
+    if _library is not None:
+        return _library
+
+    if not Path(fpath).exists():
+        raise FileNotFoundError(
+            f"{fpath} not found, build it with "
+            "`cd HarmonicMap/build && cmake .. && cmake --build . --target harmonic_map`"
+        )
+
+    library = ctypes.CDLL(str(fpath))
+    double_p = ctypes.POINTER(ctypes.c_double)
+    library.harmonic_map_uv.argtypes = (
+        double_p,
+        ctypes.c_long,
+        ctypes.c_int,
+        ctypes.POINTER(ctypes.c_int),
+        ctypes.c_int,
+        double_p,
+        ctypes.c_long,
+    )
+    library.harmonic_map_uv.restype = ctypes.c_int
+
+    _library = library
+    return library
+
+
+def _row_stride(array: np.ndarray, columns: int, name: str) -> int:
+    """Stride between the rows of a float64 array with contiguous columns."""
+    if (
+        array.dtype != np.float64
+        or array.ndim != 2
+        or array.shape[1] < columns
+        or array.strides[1] != array.itemsize
+        or array.strides[0] % array.itemsize
+    ):
+        raise ValueError(
+            f"{name} must be an (n, {columns}) float64 array with contiguous rows"
+        )
+    return array.strides[0] // array.itemsize
+
+
+def harmonic_map(
+    points: np.ndarray, faces: np.ndarray, out: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """Map a topological disk harmonically onto the unit disk with CHarmonicMap.
+
+    Args:
+        points: (n, 3) vertex positions. A column slice of a wider float64
+                array, e.g. the XYZ of an .obj's vertices, is read in place.
+        faces: (f, 3) zero-based vertex indices.
+        out: (n, 2) float64 array the UVs are written to, e.g. two columns
+             of a wider array. It may be a view of the same array as `points`.
+
+    Returns:
+        (n, 2) UV coordinates, `out` when given. Vertices no face uses are
+        left at the origin.
+
+    Raises:
+        ValueError: when the mesh is not a topological disk or the arrays
+                    do not fit.
+    """
+    library = load_library()
+
+    points = np.asarray(points)
+    if points.dtype != np.float64 or points.strides[-1] != points.itemsize:
+        points = np.ascontiguousarray(points, dtype=np.float64)
+    point_stride = _row_stride(points, 3, "points")
+    faces = np.ascontiguousarray(faces, dtype=np.intc)
+
+    n = points.shape[0]
+    if out is None:
+        out = np.zeros((n, 2))
+    uv_stride = _row_stride(out, 2, "out")
+    if out.shape[0] != n:
+        raise ValueError(f"out has {out.shape[0]} rows for {n} vertices")
+
+    if faces.size and (faces.min() < 0 or faces.max() >= n):
+        raise ValueError(_ERRORS[2])
+
+    # CHarmonicMap cannot place vertices outside the mesh, map the rest
+    used = np.zeros(n, dtype=bool)
+    used[faces.ravel()] = True
+    if used.all():
+        target, target_stride = out, uv_stride
+        mesh_points, mesh_faces = points, faces
+    else:
+        remap = np.cumsum(used, dtype=np.intc) - 1
+        mesh_points = np.ascontiguousarray(points[used, :3])
+        mesh_faces = np.ascontiguousarray(remap[faces])
+        target = np.empty((mesh_points.shape[0], 2))
+        point_stride, target_stride = 3, 2
+
+    status = library.harmonic_map_uv(
+        mesh_points.ctypes.data_as(ctypes.POINTER(ctypes.c_double)),
+        point_stride,
+        mesh_points.shape[0],
+        mesh_faces.ctypes.data_as(ctypes.POINTER(ctypes.c_int)),
+        mesh_faces.shape[0],
+        target.ctypes.data_as(ctypes.POINTER(ctypes.c_double)),
+        target_stride,
+    )
+    if status:
+        raise ValueError(_ERRORS.get(status, f"harmonic_map_uv failed ({status})"))
+
+    if target is not out:
+        out[:, :2] = 0
+        out[used, :2] = target
+    return out
@@ -55,6 +55,13 @@ class CHarmonicMap
      */
     void _set_boundary();
 
+    /*!
+     *  Number the interior vertices in reverse Cuthill-McKee order,
+     *  so vertices that are neighbors on the mesh are close in A
+     *  \return number of interior vertices
+     */
+    int _order_interior();
+
     /*! 
      * Compute angle using cosine law
      * \param a first edge length
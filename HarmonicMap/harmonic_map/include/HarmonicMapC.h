@@ -0,0 +1,50 @@
+#ifndef _HARMONIC_MAP_C_H_
+#define _HARMONIC_MAP_C_H_
+
+/*! \file HarmonicMapC.h
+ *
+ *   C interface to CHarmonicMap, so the map can be computed on arrays
+ *   in the calling process (e.g. from Python through ctypes) instead of
+ *   going through .obj files and the `map` executable.
+ */
+
+#ifdef __cplusplus
+extern "C"
+{
+#endif
+
+/*! Return codes of harmonic_map_uv */
+enum
+{
+    HARMONIC_MAP_OK = 0,
+    HARMONIC_MAP_NOT_A_DISK = 1,
+    HARMONIC_MAP_BAD_FACE = 2
+};
+
+/*!
+ *  Harmonically map a topological disk onto the unit disk
+ *  \param points vertex positions, the x y z of vertex i start at
+ *         points[i * point_stride]
+ *  \param point_stride number of doubles between two vertices, >= 3
+ *  \param n_vertices number of vertices, every one used by a face
+ *  \param faces (n_faces, 3) zero-based vertex indices
+ *  \param n_faces number of faces
+ *  \param uv output, the u v of vertex i are written to uv[i * uv_stride]
+ *         and uv[i * uv_stride + 1]. It may overlap `points`, they are
+ *         copied into the mesh before anything is written.
+ *  \param uv_stride number of doubles between two vertices, >= 2
+ *  \return HARMONIC_MAP_OK, or why the map was not computed
+ */
+int harmonic_map_uv(const double *points,
+                    long point_stride,
+                    int n_vertices,
+                    const int *faces,
+                    int n_faces,
+                    double *uv,
+                    long uv_stride);
+
+#ifdef __cplusplus
+}
+#endif
+
+#endif // !_HARMONIC_MAP_C_H_
@@ -1,5 +1,8 @@
 #include <math.h>
 #include <float.h>
+#include <algorithm>
+#include <utility>
+#include <vector>
 
 #include <Eigen/Sparse>
 
@@ -109,7 +112,6 @@ void MeshLib::CHarmonicMap::map()
     using M = CHarmonicMapMesh;
 
     // 1. Initialize
-    int vid = 0; // interior vertex id
     int bid = 0; // boundary vertex id
     for (M::MeshVertexIterator viter(m_pMesh); !viter.end(); ++viter)
     {
@@ -117,11 +119,10 @@ void MeshLib::CHarmonicMap::map()
 
         if (pV->boundary())
             pV->idx() = bid++;
-        else
-            pV->idx() = vid++;
     }
 
-    int interior_vertices = vid;
+    // interior vertex ids follow the mesh, not the file order
+    int interior_vertices = _order_interior();
     int boundary_vertices = bid;
 
     // 2. Set the matrix A and B
@@ -310,6 +311,81 @@ void MeshLib::CHarmonicMap::_set_boundary()
     printf("Parameterized the boundary using arc length parameter.\n");
 }
 
+int MeshLib::CHarmonicMap::_order_interior()
+{
+    using M = CHarmonicMapMesh;
+    using Ranked = std::pair<int, int>; // (interior degree, position)
+
+    // 1. collect the interior vertices and their interior degrees
+    std::vector<M::CVertex *> interior;
+    for (M::MeshVertexIterator viter(m_pMesh); !viter.end(); ++viter)
+    {
+        M::CVertex *pV = *viter;
+        if (!pV->boundary())
+            interior.push_back(pV);
+    }
+
+    std::vector<int> degree(interior.size(), 0);
+    std::vector<Ranked> starts;
+    for (size_t i = 0; i < interior.size(); i++)
+    {
+        for (M::VertexVertexIterator witer(interior[i]); !witer.end(); ++witer)
+        {
+            if (!(*witer)->boundary())
+                degree[i]++;
+        }
+        starts.push_back(Ranked(degree[i], (int)i));
+    }
+    std::sort(starts.begin(), starts.end());
+
+    // until it is visited, idx() = -1 - (position in `interior`)
+    for (size_t i = 0; i < interior.size(); i++)
+        interior[i]->idx() = -1 - (int)i;
+
+    // 2. breadth first search from a lowest degree vertex of each component,
+    //    visiting the neighbors of a vertex by increasing degree
+    std::vector<M::CVertex *> order;
+    order.reserve(interior.size());
+    for (size_t s = 0; s < starts.size(); s++)
+    {
+        M::CVertex *pS = interior[starts[s].second];
+        if (pS->idx() >= 0)
+            continue;
+
+        pS->idx() = 0;
+        size_t head = order.size();
+        order.push_back(pS);
+
+        while (head < order.size())
+        {
+            M::CVertex *pV = order[head++];
+
+            std::vector<Ranked> next;
+            for (M::VertexVertexIterator witer(pV); !witer.end(); ++witer)
+            {
+                M::CVertex *pW = *witer;
+                if (pW->boundary() || pW->idx() >= 0)
+                    continue;
+
+                int i = -1 - pW->idx();
+                next.push_back(Ranked(degree[i], i));
+                pW->idx() = 0;
+            }
+            std::sort(next.begin(), next.end());
+
+            for (size_t k = 0; k < next.size(); k++)
+                order.push_back(interior[next[k].second]);
+        }
+    }
+
+    // 3. reverse the Cuthill-McKee order
+    int n = (int)order.size();
+    for (int i = 0; i < n; i++)
+        order[i]->idx() = n - 1 - i;
+
+    return n;
+}
+
 double MeshLib::CHarmonicMap::_inverse_cosine_law(double a, double b, double c)
 {
     double cs = (a * a + b * b - c * c) / (2.0 * a * b);
@@ -0,0 +1,78 @@
+#include "HarmonicMapC.h"
+#include "HarmonicMap.h"
+
+using namespace MeshLib;
+
+/*! \brief CArrayMesh class
+ *
+ *   Harmonic map mesh built from vertex and face arrays
+ */
+class CArrayMesh : public CHarmonicMapMesh
+{
+  public:
+    /*!
+     *  Create the vertices and faces, vertex i gets id i + 1
+     *  \return HARMONIC_MAP_BAD_FACE when a face index is out of range
+     */
+    int build(const double *points, long point_stride, int n_vertices,
+              const int *faces, int n_faces)
+    {
+        for (int i = 0; i < n_faces * 3; i++)
+        {
+            if (faces[i] < 0 || faces[i] >= n_vertices)
+                return HARMONIC_MAP_BAD_FACE;
+        }
+
+        for (int i = 0; i < n_vertices; i++)
+        {
+            const double *p = points + i * point_stride;
+            CVertex *pV = createVertex(i + 1);
+            pV->point() = CPoint(p[0], p[1], p[2]);
+        }
+
+        for (int f = 0; f < n_faces; f++)
+        {
+            CVertex *v[3];
+            for (int k = 0; k < 3; k++)
+                v[k] = idVertex(faces[f * 3 + k] + 1);
+            createFace(v, f + 1);
+        }
+
+        labelBoundary();
+        return HARMONIC_MAP_OK;
+    }
+};
+
+int harmonic_map_uv(const double *points,
+                    long point_stride,
+                    int n_vertices,
+                    const int *faces,
+                    int n_faces,
+                    double *uv,
+                    long uv_stride)
+{
+    CArrayMesh mesh;
+    int status = mesh.build(points, point_stride, n_vertices, faces, n_faces);
+    if (status != HARMONIC_MAP_OK)
+        return status;
+
+    // CHarmonicMap exits the process on anything but a disk, check it here
+    {
+        CHarmonicMapMesh::CBoundary boundary(&mesh);
+        if (boundary.loops().size() != 1)
+            return HARMONIC_MAP_NOT_A_DISK;
+    }
+
+    CHarmonicMap mapper;
+    mapper.set_mesh(&mesh);
+    mapper.map();
+
+    for (int i = 0; i < n_vertices; i++)
+    {
+        CPoint2 &p = mesh.idVertex(i + 1)->uv();
+        uv[i * uv_stride] = p[0];
+        uv[i * uv_stride + 1] = p[1];
+    }
+
+    return HARMONIC_MAP_OK;
+}
@@ -4,52 +4,67 @@ Rewrite such that there vertex RGB values
 are matched with the texture coordinates.
 Then remove the vertex values.
 
+    python3 hm.py <mapped.obj>
+
+rewrites a map written by `bin/map` in place, while
+
+    python3 hm.py <collapsed.obj> <mapped.obj>
+
+computes the map in this process through `binding.py` (build the
+`harmonic_map` library first) and writes the mapped file once, already
+rewritten.
+
 """
 
 from pathlib import Path
 import sys
-from typing import List
 
 import numpy as np
 
+sys.path.insert(0, Path(__file__).resolve().parents[1].as_posix())
+from mesh import read_obj, write_obj
+
 
-def read_obj(fpath: Path):
-    with open(fpath) as f:
-        lines = f.readlines()
-        vt = [line for line in lines if line.startswith("vt ")]
-        vs = [line for line in lines if line.startswith("v ")]
-        fs = [line for line in lines if line.startswith("f ")]
+def combine(vertices: np.ndarray, textures: np.ndarray) -> np.ndarray:
+    """Move the map into the XYZ columns of `vertices`, in place.
 
-    vt = [line[3:].strip().split(" ") for line in vt]
-    vt = [[float(x) for x in line] for line in vt]
+    Args:
+        vertices: (n, 3 + k) XYZ + RGB rows, overwritten with U V 0 + RGB.
+        textures: (n, 2) UV rows, e.g. a view of `vertices[:, :2]` the map
+                  was solved into, which is then left as it is.
 
-    vs = [line[2:].strip().split(" ") for line in vs]
-    vs = [[float(x) for x in line] for line in vs]
+    Returns:
+        `vertices`.
+    """
+    if not np.shares_memory(vertices[:, :2], textures[:, :2]):
+        vertices[:, :2] = textures[:, :2]
+    vertices[:, 2] = 0
+    return vertices
 
-    vs = np.array(vs)
-    vt = np.array(vt)
-    return vs, vt, fs
 
+def map_combined(fpath_in: Path, fpath_out: Path):
+    """Harmonically map a collapsed mesh in process and write it combined."""
+    # only this mode needs the library, the rewrite alone works without it
+    from binding import harmonic_map
 
-def combine(vertices: np.ndarray, textures: np.ndarray):
-    h = np.hstack([textures[:, :2], np.zeros((vertices.shape[0], 1)), vertices[:, 3:]])
-    return h
+    vertices, _, faces, _, _ = read_obj(fpath_in)
+    textures = harmonic_map(vertices, faces, out=vertices[:, :2])
+    write_out(fpath_out, combine(vertices, textures), textures, faces)
 
 
-def write_out(fpath: Path, full: np.ndarray, textures: np.ndarray, faces: List[str]):
-    with open(fpath, "w") as fp:
-        for i in range(full.shape[0]):
-            fp.write(f"v {' '.join([str(x) for x in full[i,:]])}\n")
-        for i in range(textures.shape[0]):
-            fp.write(f"vt {' '.join([str(x) for x in textures[i,:]])}\n")
-        for i in range(len(faces)):
-            fp.write(f"{faces[i]}")
+def write_out(fpath: Path, full: np.ndarray, textures: np.ndarray, faces: np.ndarray):
+    # keep bin/map's `f i/i/i` face layout
+    write_obj(fpath, full, textures=textures, faces=faces, normal_faces=faces)
 
 
 if __name__ in "__main__":
+    if len(sys.argv) > 2:
+        map_combined(Path(sys.argv[1]), Path(sys.argv[2]))
+        sys.exit()
+
     # read in collapsed
     # c_vertices, c_textures, _ = read_obj(sys.argv[1])
-    h_vertices, h_textures, h_faces = read_obj(sys.argv[1])
+    h_vertices, h_textures, h_faces, _, _ = read_obj(sys.argv[1])
     hstack = combine(h_vertices, h_textures)
 
     write_out(sys.argv[1], hstack, h_textures, h_faces)
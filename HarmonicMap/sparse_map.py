@@ -0,0 +1,517 @@
+"""Harmonic map of a topological disk onto the unit disk.
+
+A sparse, vectorized take on `bin/map`. The cotangent weights are built
+straight from the face array, the boundary loop is mapped to the unit
+circle by arc length and both UV coordinates of the interior vertices are
+solved against a single factorization of the Laplacian.
+
+The output has the layout `bin/map` writes (normalized XYZ + RGB, the map
+as `vt`, vertex normals, `f i/i/i`), so `hm.py` post-processes it as before:
+
+    python3 HarmonicMap/sparse_map.py <input.obj> <output.obj>
+
+With `--coarse <coarse.obj>` (e.g. a level of the QECD pyramid) or
+`--coarse_faces <n>` the map is solved coarse-to-fine instead: directly on
+the coarse mesh, interpolated onto the fine vertices and refined there by
+conjugate gradients, which needs no factorization of the fine Laplacian.
+
+The boundary variants of one side are mapped together with
+
+    python3 HarmonicMap/sparse_map.py -v <output dir> <input.obj> [<input.obj> ...]
+
+The variants are mapped largest first. A variant cut out of a larger one
+already mapped, as `qecd.py --cut_variants` does, takes its cotangent
+weights from it. Only the weight assembly is shared, every variant is
+still factorized and solved on its own, and variants decimated on their
+own share nothing. Identical variants are mapped once.
+
+"""
+from argparse import ArgumentParser
+from collections import namedtuple
+import hashlib
+from pathlib import Path
+import sys
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+sys.path.insert(0, Path(__file__).resolve().parents[1].as_posix())
+from mesh import MeshTopology, PointIndex, read_obj, write_obj
+
+# column ordering of the direct solve. Symmetric minimum degree keeps the
+# factors of the interior Laplacian smallest. Against COLAMD on the
+# unreordered system, the fill of a 40k-vertex face drops from 3.4M to 2.2M
+# and of a 160k-vertex grid from 30M to 14M, and the grid's factorization
+# from 3.6 s to 1.4 s. SuperLU must factorize in symmetric mode with it,
+# otherwise a QECD-decimated mesh of 15k vertices takes 3.5 s instead of 0.08 s.
+PERMC_SPEC = "MMD_AT_PLUS_A"
+
+# relative residual the conjugate gradient refinement stops at, the UVs are
+# then within about 1e-7 of the direct solve, below the precision written out
+CG_RTOL = 1e-8
+
+# laplacian: (i, i) Laplacian of the interior vertices
+# rhs: (i, 2) boundary terms of the interior rows, for u and v
+# interior: (i,) vertex index of each interior row
+# boundary: the boundary loop, in order
+# uv: (n, 2) the boundary on the unit circle, every other vertex at the origin
+HarmonicSystem = namedtuple(
+    "HarmonicSystem", ("laplacian", "rhs", "interior", "boundary", "uv")
+)
+
+# largest vertex count whose faces fit face_keys()
+MAX_KEYED_VERTICES = 1 << 21
+
+# a mesh mapped in full, which the variants are looked up in
+# index: its raw vertex positions
+# face_keys: its faces as sorted vertex triples, encoded by face_keys()
+# weights: its (n, n) cotangent weights
+VariantParent = namedtuple("VariantParent", ("index", "face_keys", "weights"))
+
+
+def normalize(points: np.ndarray, like: Optional[np.ndarray] = None) -> np.ndarray:
+    """Center the points on their mean and scale them into [-1, 1].
+
+    Args:
+        points: (n, 3) vertex positions.
+        like: positions whose center and scale are used instead, so a
+              decimated copy lands in the same frame as its original.
+    """
+    like = points if like is None else like
+    center = like.mean(axis=0)
+    return (points - center) / np.abs(like - center).max()
+
+
+def vertex_normals(points: np.ndarray, faces: np.ndarray) -> np.ndarray:
+    """Area weighted vertex normals, the sum of the adjacent face normals."""
+    p0, p1, p2 = (points[faces[:, k]] for k in range(3))
+    face_normals = np.cross(p1 - p0, p2 - p0)
+
+    normals = np.zeros_like(points)
+    for k in range(3):
+        np.add.at(normals, faces[:, k], face_normals)
+
+    norms = np.linalg.norm(normals, axis=1, keepdims=True)
+    return normals / np.where(norms > 0, norms, 1.0)
+
+
+def cotangent_weights(
+    points: np.ndarray, faces: np.ndarray, topology: MeshTopology
+) -> np.ndarray:
+    """Return the (e,) cotangent weight of every edge of `topology`.
+
+    Each corner contributes the cotangent of its angle to the edge opposite
+    it, so an interior edge weighs cot(a) + cot(b) and a boundary edge the
+    cotangent of its one opposite angle, as in `bin/map`.
+    """
+    weights = np.zeros(topology.n_edges)
+    for k in range(3):
+        i, j, o = faces[:, k], faces[:, (k + 1) % 3], faces[:, (k + 2) % 3]
+        u, v = points[i] - points[o], points[j] - points[o]
+        cross = np.linalg.norm(np.cross(u, v), axis=1)
+        # degenerate corners get a large but finite weight
+        cot = np.einsum("ij,ij->i", u, v) / np.maximum(cross, 1e-12)
+        weights += np.bincount(topology.face_edges[:, k], cot, topology.n_edges)
+
+    return weights
+
+
+def circle_boundary(points: np.ndarray, loop: np.ndarray) -> np.ndarray:
+    """Place the boundary loop on the unit circle by arc length.
+
+    The target of the i-th boundary edge sits at the angle of the boundary
+    length up to and including that edge, so the loop closes at 2 pi.
+    """
+    lengths = np.linalg.norm(points[np.roll(loop, -1)] - points[loop], axis=1)
+    angles = np.cumsum(lengths) / lengths.sum() * 2.0 * np.pi
+
+    uv = np.empty((loop.shape[0], 2))
+    uv[:, 0], uv[:, 1] = np.cos(angles), np.sin(angles)
+    # edge i ends at loop[i + 1]
+    return np.roll(uv, 1, axis=0)
+
+
+def harmonic_system(
+    points: np.ndarray, faces: np.ndarray, weights=None, reorder: bool = True
+) -> HarmonicSystem:
+    """Assemble L_II x = W_IB b, the harmonic map of a topological disk.
+
+    Args:
+        points: (n, 3) vertex positions.
+        faces: (f, 3) zero-based vertex indices.
+        weights: (n, n) sparse cotangent weights, computed when not given.
+                 Only the rows of interior vertices are used.
+        reorder: number the interior rows in reverse Cuthill-McKee order
+                 instead of vertex order. `interior` maps the rows back to
+                 vertices either way.
+
+    Raises:
+        ValueError: when the mesh does not have exactly one boundary loop.
+    """
+    from scipy import sparse
+    from scipy.sparse.csgraph import reverse_cuthill_mckee
+
+    n = points.shape[0]
+    topology = MeshTopology(faces, n)
+    loops = topology.boundary_loops()
+    if len(loops) != 1:
+        raise ValueError(
+            f"Only topological disks accepted, found {len(loops)} boundary loops."
+        )
+    loop = loops[0]
+    if weights is None:
+        weights = topology.adjacency_matrix(cotangent_weights(points, faces, topology))
+
+    uv = np.zeros((n, 2))
+    uv[loop] = circle_boundary(points, loop)
+
+    # vertices no face uses have no neighbors and stay out of the solve
+    is_interior = topology.degree() > 0
+    is_interior[loop] = False
+    interior = np.flatnonzero(is_interior)
+
+    w_interior = weights[interior]
+    if reorder and interior.shape[0]:
+        # QECD and scan vertex orders scatter mesh neighbors across the
+        # matrix, RCM puts them next to each other
+        order = reverse_cuthill_mckee(
+            w_interior[:, interior].tocsr(), symmetric_mode=True
+        )
+        interior = interior[order]
+        w_interior = w_interior[order]
+
+    # the Laplacian L = D - W restricted to the interior
+    degree = np.asarray(w_interior.sum(axis=1)).ravel()
+    laplacian = (sparse.diags(degree) - w_interior[:, interior]).tocsr()
+    rhs = w_interior[:, loop] @ uv[loop]
+
+    return HarmonicSystem(laplacian, rhs, interior, loop, uv)
+
+
+def solve_direct(system: HarmonicSystem, permc_spec: str = PERMC_SPEC) -> np.ndarray:
+    """Solve u and v against one factorization of the Laplacian.
+
+    Args:
+        system: the assembled map.
+        permc_spec: SuperLU column ordering, use "COLAMD" for a system that
+                    was not reordered.
+    """
+    from scipy.sparse.linalg import splu
+
+    uv = system.uv.copy()
+    if system.interior.shape[0]:
+        lu = splu(
+            system.laplacian.tocsc(),
+            permc_spec=permc_spec,
+            options=dict(SymmetricMode=True),
+        )
+        uv[system.interior] = lu.solve(system.rhs)
+    return uv
+
+
+def solve_cg(
+    system: HarmonicSystem, guess: np.ndarray, rtol: float = CG_RTOL
+) -> Tuple[np.ndarray, int]:
+    """Refine an initial map with Jacobi preconditioned conjugate gradients.
+
+    Args:
+        system: the assembled map.
+        guess: (n, 2) initial UVs, only the interior vertices are used.
+        rtol: relative residual to stop at.
+
+    Returns:
+        The (n, 2) UVs and the number of iterations taken for u and v.
+    """
+    from scipy import sparse
+    from scipy.sparse.linalg import cg
+
+    uv = system.uv.copy()
+    iterations = 0
+    if system.interior.shape[0] == 0:
+        return uv, iterations
+
+    jacobi = sparse.diags(1.0 / system.laplacian.diagonal())
+
+    def count(_):
+        nonlocal iterations
+        iterations += 1
+
+    for k in range(2):
+        x, info = cg(
+            system.laplacian,
+            system.rhs[:, k],
+            x0=guess[system.interior, k],
+            rtol=rtol,
+            M=jacobi,
+            maxiter=10 * system.interior.shape[0],
+            callback=count,
+        )
+        if info != 0:
+            raise RuntimeError(f"conjugate gradients did not converge ({info})")
+        uv[system.interior, k] = x
+
+    return uv, iterations
+
+
+def harmonic_map(points: np.ndarray, faces: np.ndarray) -> np.ndarray:
+    """Map a topological disk harmonically onto the unit disk.
+
+    Args:
+        points: (n, 3) vertex positions.
+        faces: (f, 3) zero-based vertex indices.
+
+    Returns:
+        (n, 2) UV coordinates. Vertices no face uses are left at the origin.
+    """
+    return solve_direct(harmonic_system(points, faces))
+
+
+def decimate(
+    points: np.ndarray, faces: np.ndarray, targetfacenum: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Quadric edge collapse a copy of the mesh, keeping its boundary."""
+    import pymeshlab
+
+    ms = pymeshlab.MeshSet()
+    ms.add_mesh(pymeshlab.Mesh(vertex_matrix=points, face_matrix=faces))
+    ms.meshing_decimation_quadric_edge_collapse(
+        targetfacenum=targetfacenum, preserveboundary=True, preservetopology=True
+    )
+    coarse = ms.current_mesh()
+    return coarse.vertex_matrix(), coarse.face_matrix()
+
+
+def interpolate_uv(
+    points: np.ndarray,
+    coarse_points: np.ndarray,
+    coarse_faces: np.ndarray,
+    coarse_uv: np.ndarray,
+) -> np.ndarray:
+    """Carry a coarse map over to the vertices of the fine mesh.
+
+    Each fine vertex takes the barycentric blend of the UVs of the coarse
+    face with the nearest centroid, at its projection onto that face.
+    """
+    corners = coarse_points[coarse_faces]
+    face = PointIndex(corners.mean(axis=1)).nearest(points)
+    a, b, c = (corners[face, k] for k in range(3))
+
+    e0, e1, e2 = b - a, c - a, points - a
+    d00 = np.einsum("ij,ij->i", e0, e0)
+    d01 = np.einsum("ij,ij->i", e0, e1)
+    d11 = np.einsum("ij,ij->i", e1, e1)
+    d20 = np.einsum("ij,ij->i", e2, e0)
+    d21 = np.einsum("ij,ij->i", e2, e1)
+    denom = np.maximum(d00 * d11 - d01 * d01, 1e-300)
+
+    bary = np.empty((points.shape[0], 3))
+    bary[:, 1] = (d11 * d20 - d01 * d21) / denom
+    bary[:, 2] = (d00 * d21 - d01 * d20) / denom
+    bary[:, 0] = 1.0 - bary[:, 1] - bary[:, 2]
+    # points outside the face are pulled onto it
+    bary = np.clip(bary, 0.0, None)
+    bary /= np.maximum(bary.sum(axis=1, keepdims=True), 1e-300)
+
+    return np.einsum("ik,ikj->ij", bary, coarse_uv[coarse_faces[face]])
+
+
+def align_boundary(guess: np.ndarray, system: HarmonicSystem) -> np.ndarray:
+    """Rotate an initial map so its boundary lines up with the system's.
+
+    Every boundary loop starts at its smallest vertex, so a map carried over
+    from another mesh is off by a rotation of the unit disk.
+    """
+    loop = system.boundary
+    z = guess[loop] @ [1, 1j]
+    w = system.uv[loop] @ [1, 1j]
+    rotated = (guess @ [1, 1j]) * np.exp(1j * np.angle(np.vdot(z, w)))
+    return np.stack([rotated.real, rotated.imag], axis=1)
+
+
+def coarse_to_fine_map(
+    points: np.ndarray,
+    faces: np.ndarray,
+    coarse_points: np.ndarray,
+    coarse_faces: np.ndarray,
+    rtol: float = CG_RTOL,
+) -> Tuple[np.ndarray, int]:
+    """Solve on a coarse copy of the mesh and refine the result on the mesh.
+
+    Args:
+        points, faces: the mesh to map.
+        coarse_points, coarse_faces: a decimated copy in the same frame, with
+                                     the same boundary.
+        rtol: relative residual the refinement stops at.
+
+    Returns:
+        The (n, 2) UVs and the number of conjugate gradient iterations.
+    """
+    coarse_uv = harmonic_map(coarse_points, coarse_faces)
+    guess = interpolate_uv(points, coarse_points, coarse_faces, coarse_uv)
+    system = harmonic_system(points, faces)
+
+    return solve_cg(system, align_boundary(guess, system), rtol=rtol)
+
+
+def map_obj(
+    fpath_in: Path,
+    fpath_out: Path,
+    fpath_coarse: Optional[Path] = None,
+    coarse_faces: Optional[int] = None,
+) -> Tuple[int, int]:
+    """Harmonically map an .obj file and write it the way `bin/map` does.
+
+    Args:
+        fpath_in: the mesh to map.
+        fpath_out: where the mapped mesh is written.
+        fpath_coarse: a decimated copy of the mesh to solve coarse-to-fine from.
+        coarse_faces: decimate the mesh to this many faces to solve
+                      coarse-to-fine from, when no copy is given.
+
+    Returns:
+        The number of vertices and faces of the mesh.
+    """
+    vertices, _, faces, _, _ = read_obj(fpath_in)
+    points = normalize(vertices[:, :3])
+
+    if fpath_coarse is not None:
+        coarse_vertices, _, coarse, _, _ = read_obj(fpath_coarse)
+        coarse_points = normalize(coarse_vertices[:, :3], like=vertices[:, :3])
+        uv, _ = coarse_to_fine_map(points, faces, coarse_points, coarse)
+    elif coarse_faces is not None:
+        coarse_points, coarse = decimate(points, faces, coarse_faces)
+        uv, _ = coarse_to_fine_map(points, faces, coarse_points, coarse)
+    else:
+        uv = harmonic_map(points, faces)
+
+    write_mapped(fpath_out, vertices, points, faces, uv)
+    return vertices.shape[0], faces.shape[0]
+
+
+def face_keys(faces: np.ndarray, n_vertices: int) -> np.ndarray:
+    """Encode each face as its sorted vertex triple, in one int64."""
+    ordered = np.sort(faces, axis=1).astype(np.int64)
+    return (ordered[:, 0] * n_vertices + ordered[:, 1]) * n_vertices + ordered[:, 2]
+
+
+def variant_weights(parent: VariantParent, vertices: np.ndarray, faces: np.ndarray):
+    """Slice a variant's cotangent weights out of its parent's.
+
+    A variant cut out of the parent has the same full one-ring, and so the
+    same weights, around each of its interior vertices.
+
+    Returns:
+        The (n, n) weights, None unless every vertex and face of the variant
+        is one of the parent's.
+    """
+    # three vertex ids per key
+    if len(parent.index) > MAX_KEYED_VERTICES:
+        return None
+
+    distances, ids = parent.index.query(vertices[:, :3])
+    if distances.max() > 0 or np.unique(ids).shape[0] != ids.shape[0]:
+        return None
+
+    if not np.isin(face_keys(ids[faces], len(parent.index)), parent.face_keys).all():
+        return None
+
+    return parent.weights[ids][:, ids]
+
+
+def map_variants(fpaths: List[Path], dirpath_out: Path) -> List[Path]:
+    """Map the boundary variants of one side, reusing cotangent weights.
+
+    The meshes are mapped largest first. One whose vertices and faces are
+    all among those of a mesh already mapped in full takes its cotangent
+    weights from that mesh instead of recomputing them. Each mesh still
+    factorizes its own Laplacian, so this only saves the weight assembly,
+    about 20 ms per variant of 30k faces, next to the reading, solving and
+    writing of a full map. Identical meshes are mapped once.
+
+    Args:
+        fpaths: the variants, e.g. `data/collapsed/*source.obj`.
+        dirpath_out: where the mapped meshes are written, under the same names.
+
+    Returns:
+        The paths written, in the order of `fpaths`.
+    """
+    meshes = [read_obj(fpath) for fpath in fpaths]
+    parents: List[VariantParent] = []
+    maps = {}
+    for i in sorted(range(len(meshes)), key=lambda i: -meshes[i].vertices.shape[0]):
+        vertices, _, faces, _, _ = meshes[i]
+        points = normalize(vertices[:, :3])
+
+        # identical variants, e.g. an option that did not change the selection
+        key = hashlib.sha1(vertices.tobytes() + faces.tobytes()).hexdigest()
+        if key not in maps:
+            weights = None
+            for parent in parents:
+                weights = variant_weights(parent, vertices, faces)
+                if weights is not None:
+                    break
+            else:
+                topology = MeshTopology(faces, points.shape[0])
+                weights = cotangent_weights(points, faces, topology)
+                weights = topology.adjacency_matrix(weights)
+                parents.append(
+                    VariantParent(
+                        PointIndex(vertices[:, :3]),
+                        face_keys(faces, points.shape[0]),
+                        weights,
+                    )
+                )
+
+            maps[key] = solve_direct(harmonic_system(points, faces, weights))
+
+        write_mapped(dirpath_out / fpaths[i].name, vertices, points, faces, maps[key])
+
+    return [dirpath_out / fpath.name for fpath in fpaths]
+
+
+def write_mapped(
+    fpath: Path,
+    vertices: np.ndarray,
+    points: np.ndarray,
+    faces: np.ndarray,
+    uv: np.ndarray,
+):
+    """Write a map in the layout of `bin/map`, for hm.py to post-process."""
+    write_obj(
+        fpath,
+        np.hstack([points, vertices[:, 3:]]),
+        textures=uv,
+        faces=faces,
+        normal_faces=faces,
+        normals=vertex_normals(points, faces),
+    )
+
+
+def parse_cli():
+    ap = ArgumentParser()
+    ap.add_argument("paths", nargs="+", type=Path)
+    ap.add_argument("--coarse", "-c", dest="fpath_coarse", type=Path, default=None)
+    ap.add_argument("--coarse_faces", "-f", dest="coarse_faces", type=int, default=None)
+    ap.add_argument(
+        "--variants",
+        "-v",
+        dest="dirpath_out",
+        type=Path,
+        default=None,
+        help="map every input into this directory, variants cut out of a "
+        "larger input reuse its cotangent weights (each is still solved)",
+    )
+    args = ap.parse_args()
+
+    if args.dirpath_out is None and len(args.paths) != 2:
+        ap.error("expected <input.obj> <output.obj> or -v <dir> <input.obj> ...")
+
+    return args
+
+
+if __name__ in "__main__":
+    args = parse_cli()
+    if args.dirpath_out is not None:
+        map_variants(args.paths, args.dirpath_out)
+    else:
+        map_obj(*args.paths, args.fpath_coarse, args.coarse_faces)
@@ -8,46 +8,133 @@
 import pstats
 from pstats import SortKey
 import cProfile
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from pathlib import Path
-from typing import List
+import sys
+from typing import List, Optional
 
-from src.boundary import Boundary, determine_boundary
-from src.keypoints import run_keypoints
-from src.old_pipeline import run_face_mesh_pipeline
+from box import Box
 
-# from src.pipeline import run_face_mesh_pipeline
-from src.old_utils import parse_cli
+# the shared `mesh` package lives at the top level of the repository
+sys.path.insert(0, Path(__file__).resolve().parents[1].as_posix())
+
+from src.utils import parse_cli
+
+QECD_DIR = Path(__file__).resolve().parents[1] / "quadric_edge_collapse_decimation"
+
+
+def resolve_qecd_targetfacenum(args: Box, fpath_obj: Path) -> int:
+    """Budget the QECD target once, before the sides run in their processes.
+
+    The first run calibrates the solver on `fpath_obj`.
+    """
+    sys.path.insert(0, QECD_DIR.as_posix())
+    from qecd import resolve_targetfacenum
+
+    return resolve_targetfacenum(args.targetfacenum, fpath_obj=fpath_obj)
+
+
+def get_qecd_handoff(args: Box, targetfacenum: int):
+    """Decimate each selected mesh in memory instead of writing data/boundary."""
+    sys.path.insert(0, QECD_DIR.as_posix())
+    from qecd import qecd_arrays
+
+    return partial(qecd_arrays, targetfacenum=targetfacenum, flatten=args.flatten)
+
+
+def run_side(
+    fpath_img: Path,
+    fpath_obj: Path,
+    args: Box,
+    c_override: bool,
+    targetfacenum: Optional[int] = None,
+):
+    """Run keypoint or boundary detection on one side (source or target).
+
+    The stage modules are imported here so a keypoint-only run never loads
+    the boundary pipeline (shapely, the drawing utilities, ...).
+    """
+    from src.landmark_cache import disable_landmark_cache
+
+    if args.no_cache:
+        disable_landmark_cache()
+
+    if args.skip_boundary:
+        from src.keypoints import run_keypoints
+
+        return run_keypoints(fpath_img=fpath_img, fpath_obj=fpath_obj)
+
+    from src.boundary import Boundary, determine_boundary
+    from src.pipeline import run_face_mesh_pipeline
+
+    # will automatically run inconsistent boundaries
+    # each variant can run in its own worker process
+    boundaries: List[Boundary] = determine_boundary(args, c_override)
+    return run_face_mesh_pipeline(
+        fpath_img=fpath_img,
+        fpath_obj=fpath_obj,
+        boundaries=boundaries,
+        debug=args.debug,
+        geometric=args.geometric,
+        workers=args.workers,
+        handoff=get_qecd_handoff(args, targetfacenum) if args.qecd else None,
+    )
 
 
 if __name__ == "__main__":
     args = parse_cli()
-    fpath_source_img = Path(args.source_img)
-    fpath_target_img = Path(args.target_img)
-    fpath_source_obj = Path(args.source_obj)
-    fpath_target_obj = Path(args.target_obj)
     keypoints_only: bool = args.skip_boundary
+
+    # both sides decimate to the same target, calibrating at most once
+    targetfacenum = None
+    if args.qecd and not keypoints_only:
+        targetfacenum = resolve_qecd_targetfacenum(args, Path(args.source_obj))
+
+    sides = {
+        "source": (
+            Path(args.source_img),
+            Path(args.source_obj),
+            args,
+            True,
+            targetfacenum,
+        ),
+        "target": (
+            Path(args.target_img),
+            Path(args.target_obj),
+            args,
+            False,
+            targetfacenum,
+        ),
+    }
     # inconsistent_boundary: bool = args.inconsistent
 
     if keypoints_only:
         print("Running Keypoints only!")
-        run_keypoints(fpath_img=fpath_source_img, fpath_obj=fpath_source_obj)
+    else:
+        print("Running boundary detection!")
 
-        run_keypoints(fpath_img=fpath_target_img, fpath_obj=fpath_target_obj)
-        print("Keypoint detection complete!")
+    errors = {}
+    if args.concurrent:
+        # the two sides share nothing, run them in their own processes
+        with ProcessPoolExecutor(max_workers=len(sides)) as pool:
+            futures = {k: pool.submit(run_side, *v) for k, v in sides.items()}
+
+        for side, future in futures.items():
+            if future.exception() is not None:
+                errors[side] = future.exception()
 
     else:
-        print("Running boundary detection!")
-        # will automatically run inconsistent boundaries
-        # boundaries: List[Boundary] = determine_boundary(args, True)
-        run_face_mesh_pipeline(
-            fpath_img=fpath_source_img,
-            fpath_obj=fpath_source_obj,
-        )
-
-        # boundaries: List[Boundary] = determine_boundary(args, False)
-        run_face_mesh_pipeline(
-            fpath_img=fpath_target_img,
-            fpath_obj=fpath_target_obj,
-        )
+        for side, side_args in sides.items():
+            run_side(*side_args)
+
+    for side, err in errors.items():
+        print(f"{side} failed: {err!r}")
+
+    if errors:
+        sys.exit(1)
 
+    if keypoints_only:
+        print("Keypoint detection complete!")
+    else:
         print("Boundary detection complete.")
@@ -16,8 +16,8 @@ mp_drawing_styles = mp.solutions.drawing_styles
 mp_face_mesh = mp.solutions.face_mesh
 
 drawing_spec = mp_drawing.DrawingSpec(thickness=1, circle_radius=1)
-Boundary = namedtuple("boundary", ("name", "idxs"))
-BoundarySet = namedtuple("boundary_set", ("boundary", "chunks"))
+Boundary = namedtuple("Boundary", ("name", "idxs"))
+BoundarySet = namedtuple("BoundarySet", ("boundary", "chunks"))
 
 
 def compute_boundary_edges(boundary) -> List[Tuple[int, int]]:
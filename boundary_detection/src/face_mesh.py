@@ -10,11 +10,11 @@ from typing import Dict, List, Optional, Tuple, Union
 import cv2
 import mediapipe as mp
 from mediapipe.framework.formats.landmark_pb2 import NormalizedLandmarkList
-
+from mesh import PointIndex
 import numpy as np
-from scipy.cluster.vq import kmeans2
 from shapely import Polygon
 
+from .landmark_cache import get_landmark_cache
 from .utils import (
     get_keypoint_fpath,
     write_image,
@@ -29,6 +29,12 @@ drawing_spec = mp_drawing.DrawingSpec(thickness=1, circle_radius=1)
 # BOUNDARY_SPEC = mp_drawing.DrawingSpec(color=(0, 0, 255), thickness=1, circle_radius=2)
 BOUNDARY_SPEC = mp_drawing.DrawingSpec(color=(0, 255, 0), thickness=1, circle_radius=2)
 MASK_COLOR = [0, 255, 255]
+FACE_MESH_SETTINGS = {
+    "static_image_mode": True,
+    "max_num_faces": 1,
+    "refine_landmarks": True,
+    "min_detection_confidence": 0.5,
+}
 
 
 def add_point_voxels(keypoints, voxels: np.ndarray):
@@ -67,18 +73,30 @@ def build_mask_from_boundary(
     return z
 
 
-def compute_face_mesh(img: np.ndarray):
-    """Compute the face mesh using mediapipe.
+class FaceMeshDetector:
+    """Keep one mediapipe FaceMesh graph alive across calls.
 
-    We need to use the variable "mark" and the landmarks list isn't indexable or iterable
-    so we just return it immediately."""
-    with mp_face_mesh.FaceMesh(
-        static_image_mode=True,
-        max_num_faces=1,
-        refine_landmarks=True,
-        min_detection_confidence=0.5,
-    ) as face_mesh:
-        results = face_mesh.process(img)
+    Building the graph is the expensive part of `mp_face_mesh.FaceMesh`, so
+    the detector is created once and every image after the first one only
+    pays for inference. `static_image_mode` keeps the images independent.
+    """
+
+    def __init__(self, **settings):
+        self.settings = {**FACE_MESH_SETTINGS, **settings}
+        self.face_mesh = mp_face_mesh.FaceMesh(**self.settings)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self.face_mesh.close()
+
+    def process(self, img: np.ndarray) -> Union[NormalizedLandmarkList, int]:
+        """Return the landmarks of the first face, -1 if none was found."""
+        results = self.face_mesh.process(img)
         # results = face_mesh.process(cv2.cvtColor(img, cv2.COLOR_BGR2RGB))
         if not results.multi_face_landmarks:
             return -1
@@ -88,6 +106,55 @@ def compute_face_mesh(img: np.ndarray):
             return mark
 
 
+# created on first use so importing this module stays cheap
+_DETECTOR: Optional[FaceMeshDetector] = None
+
+
+def get_face_mesh_detector() -> FaceMeshDetector:
+    """Return the module-level detector, building it on the first call."""
+    global _DETECTOR
+    if _DETECTOR is None:
+        _DETECTOR = FaceMeshDetector()
+    return _DETECTOR
+
+
+def compute_face_mesh(img: np.ndarray, detector: Optional[FaceMeshDetector] = None):
+    """Compute the face mesh using mediapipe.
+
+    We need to use the variable "mark" and the landmarks list isn't indexable or iterable
+    so we just return it immediately. The graph is reused between calls."""
+    detector = get_face_mesh_detector() if detector is None else detector
+    return detector.process(img)
+
+
+def compute_face_mesh_from_file(
+    fpath_img: Path, detector: Optional[FaceMeshDetector] = None
+) -> Tuple[Union[NormalizedLandmarkList, int], Tuple[int]]:
+    """Compute the face mesh of an image file, going through the landmark cache.
+
+    Returns the landmarks and the image shape. On a cache hit the image is
+    neither decoded nor run through mediapipe.
+    """
+    img_bytes = fpath_img.read_bytes()
+    settings = FACE_MESH_SETTINGS if detector is None else detector.settings
+    cache = get_landmark_cache()
+
+    if cache is not None:
+        key = cache.key(img_bytes, {**settings, "mediapipe": mp.__version__})
+        hit = cache.get(key)
+        if hit is not None:
+            return hit
+
+    img = cv2.imdecode(np.frombuffer(img_bytes, dtype=np.uint8), cv2.IMREAD_COLOR)
+    landmarks = compute_face_mesh(img, detector=detector)
+
+    # a failed detection (-1) is not cached
+    if cache is not None and isinstance(landmarks, NormalizedLandmarkList):
+        cache.put(key, landmarks, img.shape)
+
+    return landmarks, img.shape
+
+
 def draw_points(
     img: np.ndarray,
     landmarks: NormalizedLandmarkList,
@@ -174,10 +241,38 @@ def get_keypoint_centroids(img: np.ndarray, color=Tuple[int, int, int], k_size=1
     return arr
 
 
+def project_landmarks(
+    landmarks: NormalizedLandmarkList, shape: Tuple[int, ...]
+) -> np.ndarray:
+    """Project normalized landmarks straight to sub-pixel image locations.
+
+    Args:
+        landmarks: the landmarks to project, in the order they should come back.
+        shape: the (height, width, ...) shape of the image they were found in.
+
+    Returns:
+        A (k, 2) array of (row, col) pixel coordinates, one row per landmark,
+        in the same layout get_keypoint_centroids() produced.
+    """
+    height, width = shape[:2]
+    xy = np.array([(m.x, m.y) for m in landmarks.landmark], dtype=float)
+    return np.column_stack((xy[:, 1] * height, xy[:, 0] * width))
+
+
 def find_keypoint_texture_ids(
-    keypoint_idx: np.ndarray, texture: np.ndarray, shape: tuple
+    keypoint_idx: np.ndarray,
+    texture: np.ndarray,
+    shape: tuple,
+    uv_index: Optional[PointIndex] = None,
 ):
-    """"""
+    """Find the texture coordinate nearest to each keypoint.
+
+    Args:
+        keypoint_idx: (row, col) pixel locations of the keypoints.
+        texture: the mesh UVs.
+        shape: the shape of the image the keypoints were found in.
+        uv_index: a PointIndex over `texture`, built here when not given.
+    """
     kpi = np.zeros(keypoint_idx.shape)
     kpi[:, 0] = keypoint_idx[:, 0] / shape[0]
     kpi[:, 1] = keypoint_idx[:, 1] / shape[1]
@@ -194,9 +289,10 @@ def find_keypoint_texture_ids(
     d["left_eye"]["uv"] = kpi[le_idx, :]
     d["right_eye"]["uv"] = kpi[re_idx, :]
 
-    for k, v in d.items():
-        distance = np.linalg.norm(texture - v["uv"], axis=1)
-        d[k]["idx"] = np.argmin(distance)
+    uv_index = PointIndex(texture) if uv_index is None else uv_index
+    idxs = uv_index.nearest([v["uv"] for v in d.values()])
+    for k, idx in zip(d, idxs):
+        d[k]["idx"] = idx
 
     return d
 
@@ -206,10 +302,24 @@ def find_metric_texture_idxs(
     metric_idx: np.ndarray,
     texture: np.ndarray,
     shape: Tuple[int, int],
+    uv_index: Optional[PointIndex] = None,
 ):
+    """Find the texture coordinate nearest to each metric point.
+
+    Args:
+        points: metric point names to landmark ids, in `metric_idx` order.
+        metric_idx: (row, col) pixel locations of the metric points.
+        texture: the mesh UVs.
+        shape: the shape of the image the points were found in.
+        uv_index: a PointIndex over `texture`, built here when not given.
+    """
     mi = np.zeros(metric_idx.shape)
     mi[:, 0] = metric_idx[:, 0] / shape[0]
     mi[:, 1] = metric_idx[:, 1] / shape[1]
+    mi[:, [0, 1]] = mi[:, [1, 0]]
+
+    uv_index = PointIndex(texture) if uv_index is None else uv_index
+    idxs = uv_index.nearest(mi)
 
     p = {}
 
@@ -217,12 +327,27 @@ def find_metric_texture_idxs(
         p[k] = {}
         p[k]["mark"] = int(v)
         p[k]["uv"] = mi[i]
-        d = np.linalg.norm(texture - mi[i], axis=1)
-        p[k]["idx"] = np.argmin(d)
+        p[k]["idx"] = idxs[i]
 
     return p
 
 
+def find_texture_idxs_in_mask(
+    texture: np.ndarray, mask: np.ndarray, channel: int = 2
+) -> np.ndarray:
+    """Return the indices of the texture coordinates that land inside the mask.
+
+    The UVs are scaled to (x, y) pixel coordinates and the mask is sampled
+    at all of them at once. A vertex is kept when the mask's `channel` is 255
+    at its pixel, e.g. the R channel of MASK_COLOR.
+    """
+    height, width = mask.shape[:2]
+    cols = np.clip(np.round(texture[:, 0] * width).astype(int), 0, width - 1)
+    rows = np.clip(np.round(texture[:, 1] * height).astype(int), 0, height - 1)
+
+    return np.flatnonzero(mask[rows, cols, channel] == 255)
+
+
 def get_color_indices_from_img(
     img: np.ndarray, color: Tuple[int, int, int], two_d_only: bool = False
 ):
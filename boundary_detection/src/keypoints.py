@@ -7,24 +7,23 @@
 from pathlib import Path
 from typing import List, Tuple
 
-import cv2
 import mediapipe as mp
+from mesh import PointIndex, read_obj
 import numpy as np
 
 
 from .face_mesh import (
     add_point_voxels,
-    compute_face_mesh,
-    draw_points,
+    compute_face_mesh_from_file,
     find_keypoint_texture_ids,
     find_keypoints,
     find_metric_points,
     find_metric_texture_idxs,
-    get_keypoint_centroids,
+    project_landmarks,
 )
 from .utils import (
+    preprocess_pixels,
     preprocess_voxels,
-    process_obj_file,
     write_points,
 )
 
@@ -38,49 +37,29 @@ MASK_COLOR = [255, 255, 255]
 
 
 def run_keypoints(fpath_img: Path, fpath_obj: Path):
-    fpath_img_ = fpath_img.resolve().as_posix()
-    img = cv2.imread(fpath_img_)
-    img = img.copy()
+    # parse the file once
+    mesh = read_obj(fpath_obj)
+    centered_voxels = preprocess_voxels(mesh.vertices, center=True, trim_z=0.875)
 
-    # process the file
-    process_obj_file(fpath_obj)
-    centered_voxels, _ = preprocess_voxels(fpath_obj, center=True, trim_z=0.875)
-
-    landmarks = compute_face_mesh(img)
+    landmarks, shape = compute_face_mesh_from_file(fpath_img)
     norm_keypoints = find_keypoints(landmarks)
     metric_idxs, norm_metric_points = find_metric_points(landmarks=landmarks)
 
-    # find the key points
-    kp_img, kp_color = draw_points(img, norm_keypoints, landmark_spec=BOUNDARY_SPEC)
-
-    # find the metric points
-    metric_img, metric_color = draw_points(
-        img, norm_metric_points, landmark_spec=BOUNDARY_SPEC
-    )
-
-    # grab the key point indices
-    kp_idx = get_keypoint_centroids(
-        kp_img, kp_color, k_size=len(norm_keypoints.landmark)
-    )
-
-    # grab the metric point indices
-    mt_idx = get_keypoint_centroids(
-        metric_img, metric_color, k_size=len(norm_metric_points.landmark)
-    )
+    # project the key and metric points straight to their pixels
+    kp_idx = project_landmarks(norm_keypoints, shape)
+    mt_idx = project_landmarks(norm_metric_points, shape)
 
     # get textures
-    fpath_texture = fpath_img
-    fpath_texture = fpath_texture.with_name(f"{fpath_img.stem}_texture.txt")
-    texture_read = np.loadtxt(fpath_texture.resolve().as_posix())
-    textures = texture_read.copy()
+    textures = preprocess_pixels(mesh.textures)
+    uv_index = PointIndex(textures)
 
     # Get the keypoint IDs
     keypoint_texture_ids = find_keypoint_texture_ids(
-        kp_idx, texture=textures, shape=img.shape
+        kp_idx, texture=textures, shape=shape, uv_index=uv_index
     )
 
     metric_point_texture_ids = find_metric_texture_idxs(
-        metric_idxs, mt_idx, texture=textures, shape=img.shape
+        metric_idxs, mt_idx, texture=textures, shape=shape, uv_index=uv_index
     )
 
     kpv = add_point_voxels(keypoint_texture_ids, centered_voxels)
@@ -0,0 +1,118 @@
+"""
+    On-disk cache of mediapipe face mesh landmarks.
+
+    Landmark detection is deterministic for a given image and detector
+    configuration, so the landmarks are stored as a compact float32 array
+    keyed by a hash of the image bytes and the detector settings. Reruns on
+    the same `source.png`/`target.png` skip the PNG decode and inference.
+"""
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from mediapipe.framework.formats.landmark_pb2 import NormalizedLandmarkList
+import numpy as np
+
+CACHE_DIR = Path(__file__).resolve().parents[1] / ".landmark_cache"
+# the cache holds a few hundred images worth of landmarks at most
+MAX_BYTES = 16 * 1024 * 1024
+
+
+def landmarks_to_array(landmarks: NormalizedLandmarkList) -> np.ndarray:
+    """Pack the landmarks into an (n, 3) float32 array of x, y, z."""
+    return np.array(
+        [(mark.x, mark.y, mark.z) for mark in landmarks.landmark], dtype=np.float32
+    )
+
+
+def array_to_landmarks(arr: np.ndarray) -> NormalizedLandmarkList:
+    """Rebuild the landmark list from an (n, 3) array of x, y, z."""
+    marks = NormalizedLandmarkList()
+    for x, y, z in arr.tolist():
+        marks.landmark.add(x=x, y=y, z=z)
+    return marks
+
+
+class LandmarkCache:
+    """Size-bounded directory of `<hash>.npz` files, evicted least recently used."""
+
+    def __init__(self, dirpath: Path = CACHE_DIR, max_bytes: int = MAX_BYTES):
+        self.dirpath = Path(dirpath)
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def key(img_bytes: bytes, settings: Dict) -> str:
+        h = hashlib.sha256(img_bytes)
+        h.update(json.dumps(settings, sort_keys=True).encode())
+        return h.hexdigest()
+
+    def _fpath(self, key: str) -> Path:
+        return self.dirpath / f"{key}.npz"
+
+    def get(self, key: str) -> Optional[Tuple[NormalizedLandmarkList, Tuple[int]]]:
+        """Return the cached landmarks and image shape, None on a miss."""
+        fpath = self._fpath(key)
+        try:
+            with np.load(fpath) as npz:
+                landmarks = array_to_landmarks(npz["landmarks"])
+                shape = tuple(npz["shape"].tolist())
+
+            # mark as recently used for eviction
+            os.utime(fpath)
+        except FileNotFoundError:
+            return None
+
+        return landmarks, shape
+
+    def put(self, key: str, landmarks: NormalizedLandmarkList, shape: Tuple[int]):
+        self.dirpath.mkdir(parents=True, exist_ok=True)
+
+        # write then rename, so concurrent runs never read a partial entry
+        fpath_tmp = self.dirpath / f"{key}.{os.getpid()}.tmp"
+        with open(fpath_tmp, "wb") as f:
+            np.savez(
+                f,
+                landmarks=landmarks_to_array(landmarks),
+                shape=np.array(shape, dtype=np.int64),
+            )
+        os.replace(fpath_tmp, self._fpath(key))
+        self._evict()
+
+    def _evict(self):
+        """Delete the least recently used entries until under `max_bytes`."""
+        entries = []
+        for f in self.dirpath.glob("*.npz"):
+            try:
+                entries.append((f.stat(), f))
+            except FileNotFoundError:
+                # evicted by another process meanwhile
+                continue
+        total = sum(st.st_size for st, _ in entries)
+
+        for st, f in sorted(entries, key=lambda e: e[0].st_mtime):
+            if total <= self.max_bytes:
+                break
+            f.unlink(missing_ok=True)
+            total -= st.st_size
+
+
+# created on first use, `disable_landmark_cache` turns caching off
+_CACHE: Optional[LandmarkCache] = None
+_ENABLED = True
+
+
+def disable_landmark_cache():
+    global _ENABLED
+    _ENABLED = False
+
+
+def get_landmark_cache() -> Optional[LandmarkCache]:
+    """Return the module-level cache, None when caching is disabled."""
+    global _CACHE
+    if not _ENABLED:
+        return None
+    if _CACHE is None:
+        _CACHE = LandmarkCache()
+    return _CACHE
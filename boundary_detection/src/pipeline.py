@@ -4,12 +4,14 @@
 
     Module to work with mediapipe face meshes.
 """
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import List, Tuple, Union
+from typing import Any, Callable, List, Optional, Tuple, Union
 
 import cv2
 import mediapipe as mp
 from mediapipe.framework.formats.landmark_pb2 import NormalizedLandmarkList
+from mesh import ObjMesh, PointIndex, read_obj
 import numpy as np
 
 from .boundary import (
@@ -22,18 +24,20 @@ from .boundary import (
 from .face_mesh import (
     add_point_voxels,
     build_mask_from_boundary,
-    compute_face_mesh,
-    draw_points,
+    compute_face_mesh_from_file,
     find_keypoint_texture_ids,
     find_keypoints,
     find_metric_points,
     find_metric_texture_idxs,
-    get_keypoint_centroids,
+    find_texture_idxs_in_mask,
+    project_landmarks,
 )
+from .landmark_cache import array_to_landmarks, landmarks_to_array
+from .polygon import compute_landmark_polygon, find_texture_idxs_in_polygon
+from .shared_arrays import ArraySpec, SharedArrays, attach_arrays
 from .utils import (
     preprocess_pixels,
     preprocess_voxels,
-    process_obj_file,
     write_object,
     write_points,
 )
@@ -67,150 +71,216 @@ def compute_boundary(
     return boundary
 
 
+def select_boundary_idxs(
+    texture: np.ndarray,
+    landmarks: NormalizedLandmarkList,
+    boundary_idx: List[int],
+    img: Optional[np.ndarray] = None,
+    debug: bool = False,
+) -> np.ndarray:
+    """Return the indices of the texture coordinates inside a boundary.
+
+    Args:
+        texture: the mesh UVs.
+        landmarks: the face mesh landmarks of the image.
+        boundary_idx: the landmark ids outlining the boundary.
+        img: the decoded image for the mask path, None selects geometrically.
+        debug: write the mask out to `mask.png`.
+    """
+    if img is None:
+        polygon = compute_landmark_polygon(landmarks, boundary_idx)
+        return find_texture_idxs_in_polygon(texture, polygon)
+
+    boundary = compute_boundary(img, boundary_idx=boundary_idx, landmarks=landmarks)
+
+    black = np.zeros(img.shape, dtype=np.uint8)
+    black[boundary[:, 1], boundary[:, 0]] = MASK_COLOR
+    mask = cv2.fillPoly(black, [boundary], MASK_COLOR)
+    cv2.imwrite("mask.png", mask) if debug else print()
+
+    # sample the mask at every vertex's pixel
+    return find_texture_idxs_in_mask(texture, mask)
+
+
+def write_variant(
+    fpath_img: Path,
+    name: str,
+    chunk: Boundary,
+    texture: np.ndarray,
+    vertices: np.ndarray,
+    faces: np.ndarray,
+    outer_idxs: np.ndarray,
+    landmarks: NormalizedLandmarkList,
+    img: Optional[np.ndarray] = None,
+    debug: bool = False,
+    handoff: Optional[Callable[[Path, ObjMesh], Any]] = None,
+) -> str:
+    """Write out one boundary variant and return its name.
+
+    The variant is the consistent boundary `name` itself when `chunk` carries
+    the same name, otherwise the boundary with the chunk taken out. Only the
+    vertices already selected by the boundary (`outer_idxs`) are tested
+    against the chunk. With `handoff` the selection goes to it instead of
+    to disk, see write_object.
+    """
+    idxs = outer_idxs
+    if chunk.name != name:
+        outer_texture = texture[outer_idxs]
+        if img is None:
+            hole = compute_landmark_polygon(landmarks, chunk.idxs)
+            inner = find_texture_idxs_in_polygon(outer_texture, hole)
+
+        else:
+            b = compute_boundary(img, boundary_idx=chunk.idxs, landmarks=landmarks)
+            chunk_mask = cv2.fillPoly(
+                np.zeros(img.shape, dtype=np.uint8), [b], MASK_COLOR
+            )
+            if debug:
+                cv2.imwrite(f"{chunk.name}_chunk.png", chunk_mask)
+            inner = find_texture_idxs_in_mask(outer_texture, chunk_mask)
+
+        idxs = np.delete(outer_idxs, inner)
+
+    # change write-out name
+    boundary_name = f"{name}_{chunk.name}" if name != chunk.name else chunk.name
+
+    write_object(
+        fpath_out=fpath_img,
+        faces=faces,
+        index=idxs,
+        texture=texture,
+        vertices=vertices,
+        boundary_name=boundary_name,
+        handoff=handoff,
+        keep_obj=debug,
+    )
+
+    return boundary_name
+
+
+# per worker process state, set once by _init_worker
+_WORKER = {}
+
+
+def _init_worker(spec: ArraySpec, handoff: Optional[Callable] = None):
+    blocks, arrays = attach_arrays(spec)
+    _WORKER["blocks"] = blocks
+    _WORKER["arrays"] = arrays
+    _WORKER["landmarks"] = array_to_landmarks(arrays["landmarks"])
+    _WORKER["handoff"] = handoff
+
+
+def _run_variant(task: Tuple[Path, str, Boundary, bool]) -> str:
+    fpath_img, name, chunk, debug = task
+    arrays = _WORKER["arrays"]
+    return write_variant(
+        fpath_img,
+        name,
+        chunk,
+        texture=arrays["texture"],
+        vertices=arrays["vertices"],
+        faces=arrays["faces"],
+        outer_idxs=arrays[f"outer_{name}"],
+        landmarks=_WORKER["landmarks"],
+        img=arrays.get("img"),
+        debug=debug,
+        handoff=_WORKER["handoff"],
+    )
+
+
 def run_face_mesh_pipeline(
     fpath_img: Path,
     fpath_obj: Path,
     boundaries: List[Union[Boundary, BoundarySet]],
     debug=False,
+    geometric=False,
+    workers: int = 1,
+    handoff: Optional[Callable[[Path, ObjMesh], Any]] = None,
 ):
-    # Convert the BGR image to RGB before processing?
-    fpath_img_ = fpath_img.resolve().as_posix()
-    img = cv2.imread(fpath_img_)
-    img = img.copy()
+    # parse the file once, every step below works on these arrays
+    mesh = read_obj(fpath_obj)
 
-    # process the file
-    process_obj_file(fpath_obj)
+    centered_voxels = preprocess_voxels(mesh.vertices, center=True, trim_z=0.6)
+    centered_texture = preprocess_pixels(mesh.textures)
+    # one spatial index over the UVs answers every point lookup
+    uv_index = PointIndex(centered_texture)
 
-    centered_voxels, _ = preprocess_voxels(fpath_obj, center=True, trim_z=0.6)
-    centered_texture, _ = preprocess_pixels(fpath_obj)
-
-    landmarks = compute_face_mesh(img)
+    landmarks, shape = compute_face_mesh_from_file(fpath_img)
     norm_keypoints = find_keypoints(landmarks)
     metric_idxs, norm_metric_points = find_metric_points(landmarks=landmarks)
 
-    # find the key points
-    kp_img, kp_color = draw_points(img, norm_keypoints, landmark_spec=LANDMARK_SPEC)
+    # project the key and metric points straight to their pixels
+    kp_idx = project_landmarks(norm_keypoints, shape)
+    mt_idx = project_landmarks(norm_metric_points, shape)
 
-    # find the metric points
-    metric_img, metric_color = draw_points(
-        img, norm_metric_points, landmark_spec=LANDMARK_SPEC
+    # the points do not depend on the boundary, resolve and write them once
+    keypoint_texture_ids = find_keypoint_texture_ids(
+        kp_idx, texture=centered_texture, shape=shape, uv_index=uv_index
     )
-
-    # grab the key point indices
-    kp_idx = get_keypoint_centroids(
-        kp_img, kp_color, k_size=len(norm_keypoints.landmark)
+    metric_point_texture_ids = find_metric_texture_idxs(
+        metric_idxs, mt_idx, texture=centered_texture, shape=shape, uv_index=uv_index
     )
 
-    # grab the metric point indices
-    mt_idx = get_keypoint_centroids(
-        metric_img, metric_color, k_size=len(norm_metric_points.landmark)
-    )
+    kpv = add_point_voxels(keypoint_texture_ids, centered_voxels)
+    mpv = add_point_voxels(metric_point_texture_ids, centered_voxels)
+
+    write_points(fpath_img, kpv)
+    write_points(fpath_img, mpv, "metrics")
 
-    fpath_texture = fpath_img
-    fpath_texture = fpath_texture.with_name(f"{fpath_img.stem}_texture.txt")
-    texture_read = np.loadtxt(fpath_texture.resolve().as_posix())
+    # only the mask path needs the decoded image
+    img = None
+    if not geometric:
+        img = cv2.imread(fpath_img.resolve().as_posix())
 
-    # repeate the following steps for each boundary
-    chunks = []
+    # select the vertices inside each consistent boundary once, every
+    # variant (the boundary itself and each of its chunks) starts from it
+    outer = {}
+    tasks: List[Tuple[Path, str, Boundary, bool]] = []
     for bound in boundaries:
+        chunks: List[Boundary] = []
         if isinstance(bound, BoundarySet):
-            chunks = bound.chunks
+            chunks = list(bound.chunks)
             bound = bound.boundary
 
-        if isinstance(bound, Boundary):
-            name = bound.name
-            boundary_idx = bound.idxs
-            chunks.append(bound)
-
-        boundary = compute_boundary(img, boundary_idx=boundary_idx, landmarks=landmarks)
-
-        for c in chunks:
-            black = np.zeros(img.shape)
-
-            black[boundary[:, 1], boundary[:, 0]] = MASK_COLOR
-            # cv2.imwrite("black.png", black) if debug else print()
-            mask = cv2.fillPoly(black, [boundary], MASK_COLOR)
-            cv2.imwrite("mask.png", mask) if debug else print()
-
-            if c.name != name:
-                b = compute_boundary(img, boundary_idx=c.idxs, landmarks=landmarks)
-                # take the chunk out
-                chunk_removed = cv2.fillPoly(mask, [b], (0, 0, 0))
-                cv2.imwrite(
-                    f"{c.name}_chunk_removed.png", chunk_removed
-                ) if debug else print()
-
-                # cv2.imwrite("keypoint.png", kp_img) if debug else print()
-                # cv2.imwrite("boundary.png", annotated_img) if debug else print()
-
-                # write out mask
-                # mask = build_mask_from_boundary(annotated_img, boundary)
-
-                # write out mask to image
-                # cv2.imwrite("binary_mask.png", mask) if debug else print()
-
-            textures = texture_read.copy()
-
-            # Understand the key points
-            keypoint_texture_ids = find_keypoint_texture_ids(
-                kp_idx, texture=textures, shape=img.shape
-            )
-
-            metric_point_texture_ids = find_metric_texture_idxs(
-                metric_idxs, mt_idx, texture=textures, shape=img.shape
-            )
-
-            # List of points of the form (y, x) & scale them to image size
-            textures[:, 0] *= img.shape[1]
-            textures[:, 1] *= img.shape[0]
-            textures = np.round(textures, 0).astype(int)
-
-            texture_img = np.zeros(img.shape)
-            for row, col in textures:
-                texture_img[col, row] = MASK_COLOR
-
-            if c.name == name:
-                cv2.imwrite(
-                    f"{c.name}_texture_image.png", texture_img
-                ) if debug else print()
-
-            # now merge with the mask, divide by 255 to return to 0-255 normal values.
-            if c.name != name:
-                constrained_face = (texture_img * chunk_removed) // 255
-            else:
-                constrained_face = (texture_img * mask) // 255
-
-            # cf = (img * mask) // 255
-            # cv2.imwrite(f"{c.name}_cf.png", cf) if debug else print()
-            cv2.imwrite(
-                f"{c.name}_constrained_face.png", constrained_face
-            ) if debug else print()
-
-            relevant_idxs = []
-            for idx, (row, col) in enumerate(textures):
-                # switch column and row
-                # if constrained face's R coordinate is red, append
-                if constrained_face[col, row][2] == 255:
-                    relevant_idxs.append(idx)
-
-            idxs = np.array(relevant_idxs)
-            kpv = add_point_voxels(keypoint_texture_ids, centered_voxels)
-            mpv = add_point_voxels(metric_point_texture_ids, centered_voxels)
-
-            # change write-out name
-            boundary_name = f"{name}_{c.name}" if name != c.name else c.name
-
-            # write everything
-            write_points(fpath_img, kpv)
-            write_points(fpath_img, mpv, "metrics")
-            write_object(
-                fpath_out=fpath_img,
-                fpath_obj=fpath_obj,
-                index=idxs,
+        chunks.append(bound)
+        outer[bound.name] = select_boundary_idxs(
+            centered_texture, landmarks, bound.idxs, img=img, debug=debug
+        )
+        tasks.extend((fpath_img, bound.name, c, debug) for c in chunks)
+
+    if workers <= 1 or len(tasks) <= 1:
+        return [
+            write_variant(
+                fpath_img,
+                name,
+                chunk,
                 texture=centered_texture,
                 vertices=centered_voxels,
-                boundary_name=boundary_name,
+                faces=mesh.faces,
+                outer_idxs=outer[name],
+                landmarks=landmarks,
+                img=img,
+                debug=debug,
+                handoff=handoff,
             )
-            #####################################
-
-        return
+            for _, name, chunk, _ in tasks
+        ]
+
+    # the workers map these arrays instead of receiving copies per task
+    arrays = {
+        "texture": centered_texture,
+        "vertices": centered_voxels,
+        "faces": mesh.faces,
+        "landmarks": landmarks_to_array(landmarks),
+        **{f"outer_{name}": idxs for name, idxs in outer.items()},
+    }
+    if img is not None:
+        arrays["img"] = img
+
+    with SharedArrays(arrays) as shared:
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(tasks)),
+            initializer=_init_worker,
+            initargs=(shared.spec, handoff),
+        ) as pool:
+            return list(pool.map(_run_variant, tasks))
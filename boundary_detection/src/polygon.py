@@ -1,6 +1,8 @@
-from typing import List, Union
+from typing import List, Optional, Union
 
+from mediapipe.framework.formats.landmark_pb2 import NormalizedLandmarkList
 import numpy as np
+import shapely
 from shapely import Polygon
 
 class SinglePoly(Polygon):
@@ -29,3 +31,38 @@ def create_2d_polygon_boundary(landmarks: np.ndarray) -> Polygon:
 
     return Polygon(landmarks)
 
+
+def compute_landmark_polygon(
+    landmarks: NormalizedLandmarkList, boundary_idx: List[int]
+) -> Polygon:
+    """Build the boundary polygon straight from the normalized landmarks.
+
+    The coordinates stay normalized (x along the width, y along the height),
+    which is the same space as the mesh's texture coordinates.
+    """
+    coords = [(landmarks.landmark[i].x, landmarks.landmark[i].y) for i in boundary_idx]
+    polygon = Polygon(coords)
+
+    # a self-touching contour would make the containment test unreliable
+    if not polygon.is_valid:
+        polygon = polygon.buffer(0)
+
+    return polygon
+
+
+def find_texture_idxs_in_polygon(
+    texture: np.ndarray, polygon: Polygon, hole: Optional[Polygon] = None
+) -> np.ndarray:
+    """Return the indices of the texture coordinates inside the polygon.
+
+    Every UV is tested at once against the prepared geometry. Points inside
+    `hole` (e.g. an inconsistent boundary chunk) are left out.
+    """
+    shapely.prepare(polygon)
+    inside = shapely.contains_xy(polygon, texture[:, 0], texture[:, 1])
+
+    if hole is not None:
+        shapely.prepare(hole)
+        inside &= ~shapely.contains_xy(hole, texture[:, 0], texture[:, 1])
+
+    return np.flatnonzero(inside)
@@ -0,0 +1,66 @@
+"""
+    Share NumPy arrays with worker processes through shared memory.
+
+    The parent copies each array into a named shared memory block once and
+    hands the workers a small spec (block name, shape, dtype). Workers map
+    the same blocks as read-only arrays, so the decoded image and mesh
+    arrays are never pickled per task.
+"""
+from multiprocessing import shared_memory
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+# name -> (shared memory block name, shape, dtype string)
+ArraySpec = Dict[str, Tuple[str, Tuple[int, ...], str]]
+
+
+class SharedArrays:
+    """Owner of the shared memory blocks backing a set of arrays.
+
+    Use as a context manager in the parent process; the blocks are unlinked
+    on exit.
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        self.blocks: List[shared_memory.SharedMemory] = []
+        self.spec: ArraySpec = {}
+        for name, arr in arrays.items():
+            arr = np.ascontiguousarray(arr)
+            # zero-sized blocks are not allowed
+            block = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+            np.ndarray(arr.shape, dtype=arr.dtype, buffer=block.buf)[...] = arr
+            self.blocks.append(block)
+            self.spec[name] = (block.name, arr.shape, arr.dtype.str)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
+
+
+def attach_arrays(
+    spec: ArraySpec,
+) -> Tuple[List[shared_memory.SharedMemory], Dict[str, np.ndarray]]:
+    """Map the arrays described by `spec` without copying them.
+
+    Returns the attached blocks, which must outlive the arrays, and the
+    read-only arrays by name.
+    """
+    blocks = []
+    arrays = {}
+    for name, (block_name, shape, dtype) in spec.items():
+        block = shared_memory.SharedMemory(name=block_name)
+        arr = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+        arr.flags.writeable = False
+        blocks.append(block)
+        arrays[name] = arr
+
+    return blocks, arrays
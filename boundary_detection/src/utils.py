@@ -1,12 +1,10 @@
 from argparse import ArgumentParser
 from pathlib import Path
-import re
-from typing import Dict, List, Tuple, Union
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
 from box import Box
 import cv2
-import numpy as np
-
+from mesh import PRECISION, ObjMesh, read_obj, write_obj
 import numpy as np
 
 
@@ -136,6 +134,51 @@ def parse_cli() -> ArgumentParser:
         action="store_true",
     )
 
+    ap.add_argument(
+        "--no_cache",
+        "-n",
+        dest="no_cache",
+        action="store_true",
+    )
+    ap.add_argument(
+        "--geometric",
+        "-g",
+        dest="geometric",
+        action="store_true",
+    )
+    ap.add_argument(
+        "--concurrent",
+        "-p",
+        dest="concurrent",
+        action="store_true",
+    )
+    ap.add_argument(
+        "--qecd",
+        "-q",
+        dest="qecd",
+        action="store_true",
+    )
+    ap.add_argument(
+        "--targetfacenum",
+        "-f",
+        dest="targetfacenum",
+        type=int,
+        default=None,
+    )
+    ap.add_argument(
+        "--flatten",
+        "-z",
+        dest="flatten",
+        action="store_true",
+    )
+    ap.add_argument(
+        "--workers",
+        "-w",
+        dest="workers",
+        type=int,
+        default=1,
+    )
+
     args = ap.parse_args()
     args = Box(args.__dict__)
 
@@ -210,95 +253,45 @@ def center_object(obj: np.ndarray):
     return np.hstack([centered_obj, obj[:, csize:]])
 
 
-def preprocess_pixels(in_fpath: Path, center: bool = False) -> Tuple[np.ndarray, Path]:
-    with open(in_fpath, "r") as pix:
-        p_ = pix.read()
-
-    pixels = re.findall("vt\ .*", p_)
-    pixels = [p.replace("vt ", "").replace(" ", ",").split(",") for p in pixels]
-    px = np.array(pixels, float)
-
-    if center:
-        px = center_object(px)
-        fname_out = in_fpath.with_name(f"{in_fpath.stem}_centered.txt")
-    else:
-        fname_out = in_fpath
-    return px, fname_out
+def preprocess_pixels(pixels: np.ndarray, center: bool = False) -> np.ndarray:
+    """Prepare the texture (2D) coordinates parsed by `mesh.read_obj`."""
+    px = center_object(pixels) if center else pixels.copy()
+    return px
 
 
 def preprocess_voxels(
-    in_fpath: Path, center: bool = False, trim_z: float = 1.0
-) -> Tuple[np.ndarray, Path]:
-    with open(in_fpath, "r") as vox:
-        v_ = vox.read()
-
-    voxels = re.findall("v\ .*", v_)
-    voxels = [
-        v.replace("v ", "").replace(" ", ",").replace("\n", "").split(",")
-        for v in voxels
-    ]
-    vx = np.array(voxels, float)
-    if center:
-        vx = center_object(vx)
-        fname_out = in_fpath.with_name(f"{in_fpath.stem}_centered.txt")
-    else:
-        fname_out = in_fpath
+    voxels: np.ndarray, center: bool = False, trim_z: float = 1.0
+) -> np.ndarray:
+    """Prepare the vertex (3D) coordinates parsed by `mesh.read_obj`."""
+    vx = center_object(voxels) if center else voxels.copy()
 
     trim_z = trim_z if trim_z <= 1.0 and trim_z >= 0.0 else 1.0
     if trim_z != 1.0:
         trim_min = vx[:, 2].min() * trim_z
         vx[:, 2] = np.maximum(vx[:, 2], trim_min)
 
-    return vx, fname_out
-
-
-def process_obj_file(in_fpath: Path):
-    """Split the input .obj file into voxel and texture files.
-
-    In order to know which voxel (3D) points we're manipulating,
-    we also need to know the corresponding texture (2D) points.
-    These are neatly organized by index in a Wavefront (.obj) file.
-    According to Wikipedia's page on formatting Wavefront files
-    (https://en.wikipedia.org/wiki/Wavefront_.centered_objfile), there is
-    a clean way of parsing out the voxels from the texture points
-    using regular expressions.
-    """
-    voxel_re = re.compile("v\ ")
-    texture_re = re.compile("vt\ ")
+    return vx
 
-    dirpath_out = in_fpath
-    fname_voxel = dirpath_out.with_name(f"{in_fpath.stem}_voxels.txt")
-    fname_texture = dirpath_out.with_name(f"{in_fpath.stem}_texture.txt")
 
-    with open(in_fpath.resolve().as_posix(), "r") as f:
-        with open(fname_voxel.resolve().as_posix(), "w") as two, open(
-            fname_texture.resolve().as_posix(), "w"
-        ) as three:
-            for line in f.readlines():
-                if voxel_re.search(line):
-                    two.write(f"{line[2:]}")
-
-                if texture_re.search(line):
-                    three.write(f"{line[3:]}")
-
-
-def update_vertex_indices(face_string: str, mapping: Dict[int, int]) -> str:
-    """Update the vertex indices to adjust for points I filtered out.
+def reindex_faces(faces: np.ndarray, index: np.ndarray, n_vertices: int) -> np.ndarray:
+    """Keep the faces whose vertices are all in `index` and renumber them.
 
     Args:
-        face_string (str): A string in the form `f int1/int1 int2/int2 int3/int3`.
-        mapping (Dict[int, int]): A mapping between a vertex's index in the input file and output file.
+        faces (np.ndarray): (n, 3) zero-based vertex indices of the input mesh.
+        index (np.ndarray): zero-based indices of the vertices being kept, in output order.
+        n_vertices (int): number of vertices in the input mesh.
 
     Returns:
-        (str) A string in the form `f int1/int1 int2/int2 int3/int3`.
-
+        (np.ndarray) (m, 3) zero-based vertex indices into the kept vertices.
     """
-    updated_idxs = "f "
-    fs = [int(x.split("/")[0]) for x in face_string[2:].strip().split(" ")]
-    for idx in fs:
-        updated_idxs += str(mapping[idx]) + "/" + str(mapping[idx]) + " "
-    updated_idxs = updated_idxs[:-1]
-    return updated_idxs + "\n"
+    # dense lookup from input index to output index, -1 means dropped
+    lookup = np.full(n_vertices, -1, dtype=np.int64)
+    lookup[index] = np.arange(index.shape[0])
+
+    remapped = lookup[faces]
+    keep = (remapped >= 0).all(axis=1)
+
+    return remapped[keep]
 
 
 def write_image(fpath: Path, img: np.ndarray, **kwargs) -> bool:
@@ -333,54 +326,55 @@ def write_points(
             fmp.write(f"{k} {' '.join([str(v) for v in vox])}\n")
 
 
+def select_submesh(
+    faces: np.ndarray, index: np.ndarray, texture: np.ndarray, vertices: np.ndarray
+) -> ObjMesh:
+    """Cut the selected vertices, and the faces they fully cover, out of the mesh."""
+    index = np.asarray(index, dtype=np.int64)
+
+    # only faces with all vertices inside the boundary, renumbered for the output
+    selected_faces = reindex_faces(faces, index, vertices.shape[0])
+
+    return ObjMesh(vertices[index], texture[index], selected_faces, None, None)
+
+
 def write_object(
     fpath_out: Path,
-    fpath_obj: Path,
+    faces: np.ndarray,
     index: np.ndarray,
     texture: np.ndarray,
     vertices: np.ndarray,
     boundary_name: str = "",
-) -> None:
-    """Create an .obj file using the texture and vertices data."""
-    d = {"prefix": boundary_name, "extension": "obj"}
+    precision: int = PRECISION,
+    handoff: Optional[Callable[[Path, ObjMesh], Any]] = None,
+    keep_obj: bool = False,
+) -> Any:
+    """Create an .obj file using the texture and vertices data.
 
-    # map to translate unfiltered index values to filtered values
-    idx_mapping = {}
+    Args:
+        handoff: called with the would-be .obj path and the selected mesh,
+                 e.g. to decimate it in memory. The file is then only written
+                 when `keep_obj` is set.
+        keep_obj: write the .obj even when handing the mesh off.
 
-    get_vertex_indices = lambda a: set(
-        [int(x.split("/")[0]) for x in a[2:].strip().split(" ")]
-    )
+    Returns:
+        Whatever `handoff` returns, None without one.
+    """
+    d = {"prefix": boundary_name, "extension": "obj"}
 
     fpath_selected = get_boundary_fpath(fpath_out, **d)
+    submesh = select_submesh(faces, index, texture, vertices)
 
-    with open(fpath_selected, "w") as s:
+    if handoff is None or keep_obj:
         # TODO: Should I include a 'material' .mtl file in the header?
-        # create an index set
-        index_ = set(index)
-        # write vertices (3D) first
-        for i, idx in enumerate(index):
-            line = vertices[idx]
-            # indices start at 1 for .obj files
-            idx_mapping[idx] = i + 1
-            s.write(f"v {' '.join([str(s) for s in line])}\n")
-
-        # write texture (2D) second
-        for lin in texture[index]:
-            s.write(f"vt {' '.join([str(s) for s in lin])}\n")
-
-        with open(fpath_obj, "r") as f_obj:
-            read = f_obj.read()
-            # two different WaveFront object face formats. This makes sure both use
-            # cases are accounted for
-            format1 = re.findall("(f(?:\ \d*\/\d*\/\d*){3}\\n)", read)
-            format2 = re.findall("(f(?:\ \d*\/\d*){3}\\n)", read)
-            format = format1 if len(format1) > len(format2) else format2
-
-            # for every face in the mesh...
-            for face_idxs in format:
-                vtx = get_vertex_indices(face_idxs)
-
-                # make sure all the face vertices are within the boundary
-                if len(vtx.intersection(index_)) == 3:
-                    updated_idxs = update_vertex_indices(face_idxs, idx_mapping)
-                    s.write(updated_idxs)
+        # faces share their vertex and texture indices, `f i/i j/j k/k`
+        write_obj(
+            fpath_selected,
+            vertices=submesh.vertices,
+            textures=submesh.textures,
+            faces=submesh.faces,
+            precision=precision,
+        )
+
+    if handoff is not None:
+        return handoff(Path(fpath_selected), submesh)
@@ -0,0 +1,5 @@
+"""
+    Python stages of the pipeline behind one command line entry point.
+
+    See `python -m jedi_trials --help`.
+"""
@@ -0,0 +1,142 @@
+"""
+    Single entry point for the Python stages of the pipeline.
+
+        python -m jedi_trials <stage> [stage arguments]
+
+    Each stage runs its existing script (same arguments, same working
+    directory as the shell scripts use) and imports its dependencies only
+    when it runs, so e.g. a Möbius run never loads mediapipe or pymeshlab.
+
+        python -m jedi_trials budget
+
+    measures every stage's import time in a fresh interpreter and fails when
+    one is over its budget.
+"""
+from argparse import REMAINDER, ArgumentParser
+from collections import namedtuple
+import os
+from pathlib import Path
+import runpy
+import subprocess
+import sys
+from typing import List, Optional
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# dirname: directory of the script, relative to the repository root
+# script: the stage's entry script inside dirname
+# chdir: run from dirname instead of the caller's directory
+# args: arguments put in front of the user's
+# modules: what the stage imports before doing any work
+# budget: allowed import time of `modules`, in seconds
+Stage = namedtuple("Stage", ("dirname", "script", "chdir", "args", "modules", "budget"))
+
+# Budgets leave about 2x headroom over import times measured on a warm cache
+# (Linux, Python 3.11): qecd 0.08s (pymeshlab, another 0.15s, loads on first
+# use), map 0.07s (scipy.sparse, another 0.3s, loads on first use), hm 0.07s,
+# mobius 0.08s, metrics 0.55s. boundary and keypoints are dominated by their
+# dependencies: mediapipe 0.96s, cv2 0.16s, shapely 0.13s, numpy 0.10s,
+# box 0.04s.
+STAGES = {
+    "boundary": Stage(
+        "boundary_detection",
+        "main.py",
+        True,
+        (),
+        ("main", "src.boundary", "src.pipeline"),
+        2.5,
+    ),
+    "keypoints": Stage(
+        "boundary_detection",
+        "main.py",
+        True,
+        ("-k",),
+        ("main", "src.keypoints"),
+        2.25,
+    ),
+    "qecd": Stage(
+        "quadric_edge_collapse_decimation", "qecd.py", False, (), ("qecd",), 0.25
+    ),
+    "map": Stage("HarmonicMap", "sparse_map.py", False, (), ("sparse_map",), 0.25),
+    "hm": Stage("HarmonicMap", "hm.py", False, (), ("hm",), 0.25),
+    "mobius": Stage("mobius", "mobius.py", False, (), ("mobius",), 0.25),
+    # error_distrib.py plots as a script, only its imports are timed
+    "metrics": Stage(
+        "visualization", "error_distrib.py", False, (), ("matplotlib.pyplot",), 1.25
+    ),
+}
+
+_TIME_IMPORTS = """
+import sys, time
+sys.path[:0] = {paths!r}
+t = time.perf_counter()
+for m in {modules!r}:
+    __import__(m)
+print(time.perf_counter() - t)
+"""
+
+
+def run_stage(name: str, argv: List[str]):
+    """Run a stage's script in this process as if it had been invoked directly."""
+    stage = STAGES[name]
+    dirpath = ROOT / stage.dirname
+    if stage.chdir:
+        os.chdir(dirpath)
+
+    sys.path[:0] = [dirpath.as_posix(), ROOT.as_posix()]
+    script = (dirpath / stage.script).as_posix()
+    sys.argv = [script, *stage.args, *argv]
+    runpy.run_path(script, run_name="__main__")
+
+
+def time_imports(name: str) -> float:
+    """Import a stage's modules in a fresh interpreter and return the seconds taken."""
+    stage = STAGES[name]
+    dirpath = ROOT / stage.dirname
+    code = _TIME_IMPORTS.format(
+        paths=[dirpath.as_posix(), ROOT.as_posix()], modules=list(stage.modules)
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=dirpath if stage.chdir else ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def check_budget(names: List[str]) -> int:
+    """Print each stage's import time against its budget, 1 if any is over."""
+    over = False
+    for name in names:
+        budget = STAGES[name].budget
+        try:
+            seconds = time_imports(name)
+        except subprocess.CalledProcessError as err:
+            over = True
+            reason = err.stderr.strip().splitlines()[-1]
+            print(f"{name:<10} import failed: {reason}")
+            continue
+
+        over |= seconds > budget
+        status = "ok" if seconds <= budget else "OVER"
+        print(f"{name:<10} {seconds:6.2f}s / {budget:.2f}s  {status}")
+
+    return int(over)
+
+
+def parse_cli(argv: Optional[List[str]] = None):
+    ap = ArgumentParser(prog="python -m jedi_trials")
+    ap.add_argument("stage", choices=[*STAGES, "budget"])
+    ap.add_argument("args", nargs=REMAINDER)
+    return ap.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_cli(argv)
+    if args.stage == "budget":
+        return check_budget(args.args or list(STAGES))
+
+    run_stage(args.stage, args.args)
+    return 0
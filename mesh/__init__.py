@@ -0,0 +1,3 @@
+from .obj import PRECISION, ObjMesh, read_obj, read_point_file, write_obj
+from .spatial import PointIndex
+from .topology import MeshTopology
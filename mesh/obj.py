@@ -0,0 +1,251 @@
+"""Read and write Wavefront (.obj) meshes as NumPy arrays.
+
+    Every stage of the pipeline (boundary detection, QECD, harmonic map
+    post-processing, Möbius) consumes the same handful of record types:
+    `v`, `vt` and triangular `f` lines. They are parsed here from a single
+    read of the file and converted to contiguous arrays in bulk, and
+    written back out block by block instead of one `write` per row.
+
+"""
+from collections import namedtuple
+from pathlib import Path
+from typing import Dict, Optional, TextIO, Union
+
+import numpy as np
+
+SPACE, TAB, SLASH, NEWLINE = ord(" "), ord("\t"), ord("/"), ord("\n")
+# allowed before and after the `/` of a face corner
+DIGITS = np.frombuffer(b"0123456789", dtype=np.uint8)
+SIGNED_DIGITS = np.frombuffer(b"-0123456789", dtype=np.uint8)
+# default number of decimals written for float columns
+PRECISION = 6
+# rows formatted per `write` call
+CHUNK_ROWS = 65536
+
+# faces are zero-based, (n, 3) int32 arrays. normal_faces is None unless the
+# file uses the `f v/vt/vn` format.
+ObjMesh = namedtuple(
+    "ObjMesh", ("vertices", "textures", "faces", "texture_faces", "normal_faces")
+)
+
+
+def _record_bytes(buf: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> bytes:
+    """Gather the bytes of the selected lines, slicing when they are contiguous."""
+    if starts.shape[0] == 0:
+        return b""
+
+    # writers group records by type, so this is nearly always a single slice
+    if np.array_equal(starts[1:], ends[:-1] + 1):
+        return buf[starts[0] : ends[-1]].tobytes()
+
+    lengths = ends - starts + 1
+    offsets = np.repeat(starts - np.cumsum(np.r_[0, lengths[:-1]]), lengths)
+    return buf[np.arange(lengths.sum()) + offsets].tobytes()
+
+
+def _parse_rows(text: bytes, n_rows: int, dtype: type, name: str) -> np.ndarray:
+    """Convert whitespace separated rows into a 2D array in one call."""
+    if n_rows == 0:
+        return np.empty((0, 0), dtype=dtype)
+
+    flat = np.fromstring(text, dtype=dtype, sep=" ")
+    if flat.size % n_rows != 0:
+        raise ValueError(f"Rows of '{name}' records have inconsistent lengths.")
+
+    return flat.reshape(n_rows, -1)
+
+
+def _split_faces(idx: np.ndarray, k: int):
+    """Split `f v/vt v/vt v/vt` or `f v/vt/vn ...` rows into index arrays."""
+    if idx.shape[0] == 0:
+        empty = np.empty((0, 3), dtype=np.int32)
+        return empty, empty.copy(), None
+
+    if idx.shape[1] != 3 * k:
+        raise ValueError("Only triangular 'f' records are supported.")
+
+    idx = idx.astype(np.int32) - 1
+
+    faces = np.ascontiguousarray(idx[:, 0::k])
+    texture_faces = np.ascontiguousarray(idx[:, 1::k]) if k > 1 else faces.copy()
+    normal_faces = np.ascontiguousarray(idx[:, 2::k]) if k > 2 else None
+
+    return faces, texture_faces, normal_faces
+
+
+def _is_blank(c: np.ndarray) -> np.ndarray:
+    """Whether each byte is a space or a tab."""
+    return (c == SPACE) | (c == TAB)
+
+
+def _face_arity(
+    buf: np.ndarray, starts: np.ndarray, is_f: np.ndarray, slashes: np.ndarray
+) -> int:
+    """Return the indices per face corner: 1 (v), 2 (v/vt) or 3 (v/vt/vn).
+
+    Raises:
+        ValueError: when an index between slashes is empty (`v//vn`) or the
+                    `f` records do not all use the same format.
+    """
+    # slashes elsewhere, e.g. in an `mtllib` path, are not parsed
+    lines = np.searchsorted(starts, slashes, side="right") - 1
+    on_f = is_f[lines]
+    slashes, lines = slashes[on_f], lines[on_f]
+    if slashes.shape[0] == 0:
+        return 1
+
+    # every slash sits between two indices, the one after may be negative
+    before, after = buf[slashes - 1], buf[slashes + 1]
+    if not (np.isin(before, DIGITS) & np.isin(after, SIGNED_DIGITS)).all():
+        raise ValueError("Empty index between the slashes of an 'f' record.")
+
+    # two or four slashes per triangle, on every line
+    counts = np.bincount(lines, minlength=starts.shape[0])[is_f]
+    if (counts != counts[0]).any() or counts[0] % 3:
+        raise ValueError("'f' records are not triangles in one index format.")
+
+    return int(counts[0]) // 3 + 1
+
+
+def _check_indices(idx: np.ndarray, n: int, name: str) -> None:
+    """Raise when zero-based face indices fall outside `n` defined rows."""
+    if idx.size and (idx.min() < 0 or idx.max() >= n):
+        raise ValueError(f"'f' records index {name} outside the {n} defined.")
+
+
+def read_obj(fpath: Union[str, Path]) -> ObjMesh:
+    """Parse the vertices, textures and faces of an .obj file in one pass.
+
+    The file is read once as bytes. Lines are classified by their first
+    characters with array comparisons, the record prefixes and the `/` face
+    separators are blanked out in place, and each record type is converted
+    by a single `np.fromstring` call.
+
+    Args:
+        fpath (Union[str, Path]): Path to the Wavefront file.
+
+    Returns:
+        (ObjMesh) float64 vertices (every column of the `v` rows, e.g. XYZ + RGB),
+        float64 textures and zero-based int32 face index arrays.
+
+    Raises:
+        ValueError: when the `f` records are not triangles in one of the
+                    `v`, `v/vt` or `v/vt/vn` formats, or index a vertex or
+                    texture coordinate that is not defined.
+    """
+    raw = np.fromfile(fpath, dtype=np.uint8)
+    # terminate the last line and pad so the prefix lookups stay in bounds
+    buf = np.concatenate([raw, np.full(3, NEWLINE, dtype=np.uint8)])
+
+    ends = np.flatnonzero(buf[: raw.shape[0] + 1] == NEWLINE)
+    starts = np.r_[0, ends[:-1] + 1]
+
+    # records may be indented and their tag followed by any blank
+    heads = starts.copy()
+    indented = _is_blank(buf[starts])
+    if indented.any():
+        solid = np.flatnonzero(~_is_blank(buf))
+        heads[indented] = solid[np.searchsorted(solid, starts[indented])]
+    c0, c1, c2 = buf[heads], buf[heads + 1], buf[heads + 2]
+
+    is_v = (c0 == ord("v")) & _is_blank(c1)
+    is_vt = (c0 == ord("v")) & (c1 == ord("t")) & _is_blank(c2)
+    is_f = (c0 == ord("f")) & _is_blank(c1)
+
+    slashes = np.flatnonzero(buf == SLASH)
+    k = _face_arity(buf, starts, is_f, slashes)
+
+    buf[heads[is_v]] = SPACE
+    buf[heads[is_vt]] = SPACE
+    buf[heads[is_vt] + 1] = SPACE
+    buf[heads[is_f]] = SPACE
+    buf[slashes] = SPACE
+
+    records = {}
+    for name, mask, dtype in (
+        ("v", is_v, np.float64),
+        ("vt", is_vt, np.float64),
+        ("f", is_f, np.int64),
+    ):
+        text = _record_bytes(buf, starts[mask], ends[mask])
+        records[name] = _parse_rows(text, int(mask.sum()), dtype, name)
+
+    faces, texture_faces, normal_faces = _split_faces(records["f"], k)
+    _check_indices(faces, records["v"].shape[0], "vertices")
+    if k > 1:
+        _check_indices(texture_faces, records["vt"].shape[0], "texture coordinates")
+
+    return ObjMesh(records["v"], records["vt"], faces, texture_faces, normal_faces)
+
+
+def read_point_file(fpath: Union[str, Path]) -> Dict[str, np.ndarray]:
+    """Read a `<name> <x> [<y> ...]` keypoint or metric point file."""
+    points = {}
+    with open(fpath, "r") as f:
+        for line in f.read().splitlines():
+            name, _, values = line.strip().partition(" ")
+            if name:
+                points[name] = np.fromstring(values, dtype=np.float64, sep=" ")
+
+    return points
+
+
+def _write_rows(f: TextIO, row_fmt: str, rows: np.ndarray, chunk_rows: int) -> None:
+    """Format `rows` with one `%` operation per block of `chunk_rows` rows."""
+    for start in range(0, rows.shape[0], chunk_rows):
+        block = rows[start : start + chunk_rows]
+        f.write((row_fmt * block.shape[0]) % tuple(block.ravel().tolist()))
+
+
+def write_obj(
+    fpath: Union[str, Path],
+    vertices: np.ndarray,
+    textures: Optional[np.ndarray] = None,
+    faces: Optional[np.ndarray] = None,
+    texture_faces: Optional[np.ndarray] = None,
+    normal_faces: Optional[np.ndarray] = None,
+    normals: Optional[np.ndarray] = None,
+    precision: int = PRECISION,
+    chunk_rows: int = CHUNK_ROWS,
+) -> None:
+    """Write vertices, textures and faces to an .obj file in bulk.
+
+    Args:
+        fpath (Union[str, Path]): Output path.
+        vertices (np.ndarray): (n, k) vertex rows, e.g. XYZ or XYZ + RGB.
+        textures (Optional[np.ndarray]): (m, 2) texture rows.
+        faces (Optional[np.ndarray]): (f, 3) zero-based vertex indices.
+        texture_faces (Optional[np.ndarray]): (f, 3) zero-based texture indices.
+            Defaults to `faces` when textures are written.
+        normal_faces (Optional[np.ndarray]): (f, 3) zero-based normal indices,
+            switches the face format to `f v/vt/vn`.
+        normals (Optional[np.ndarray]): (n, 3) normal rows, written as `vn`.
+        precision (int): Number of decimals written for vertices and textures.
+        chunk_rows (int): Number of rows formatted per write.
+    """
+    float_fmt = f" %.{precision}f"
+
+    with open(fpath, "w") as f:
+        _write_rows(f, "v" + float_fmt * vertices.shape[1] + "\n", vertices, chunk_rows)
+
+        if textures is not None:
+            row_fmt = "vt" + float_fmt * textures.shape[1] + "\n"
+            _write_rows(f, row_fmt, textures, chunk_rows)
+
+        if normals is not None:
+            row_fmt = "vn" + float_fmt * normals.shape[1] + "\n"
+            _write_rows(f, row_fmt, normals, chunk_rows)
+
+        if faces is None:
+            return
+
+        corners = [faces]
+        if textures is not None:
+            corners.append(faces if texture_faces is None else texture_faces)
+            if normal_faces is not None:
+                corners.append(normal_faces)
+
+        # interleave to (f, 3 * k) so a row reads v1 vt1 [vn1] v2 vt2 [vn2] ...
+        face_rows = np.stack(corners, axis=2).reshape(faces.shape[0], -1) + 1
+        corner_fmt = " " + "/".join(["%d"] * len(corners))
+        _write_rows(f, "f" + corner_fmt * faces.shape[1] + "\n", face_rows, chunk_rows)
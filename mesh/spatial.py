@@ -0,0 +1,46 @@
+"""Nearest-neighbor lookups over mesh coordinates.
+
+    Several stages map a handful of named points (keypoints, metric points)
+    back onto the closest mesh vertex, either in texture (UV) space or in
+    3D after decimation. A k-d tree is built once per coordinate array and
+    every lookup against it is answered in a single batched query.
+
+"""
+from typing import Tuple
+
+import numpy as np
+
+
+class PointIndex:
+    """A k-d tree over the rows of a coordinate array.
+
+    Args:
+        points: (n, d) coordinates, e.g. the UVs or vertices of a mesh.
+    """
+
+    def __init__(self, points: np.ndarray):
+        # scipy.spatial is slow to import, only pay for it when an index is built
+        from scipy.spatial import cKDTree
+
+        self.points = np.ascontiguousarray(points, dtype=np.float64)
+        self.tree = cKDTree(self.points)
+
+    def __len__(self) -> int:
+        return self.points.shape[0]
+
+    def query(self, queries: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Return the distance to and index of the nearest point for each query.
+
+        Args:
+            queries: (k, d) or (d,) coordinates in the same space as `points`.
+
+        Returns:
+            Two (k,) arrays, the distances and the row indices into `points`.
+        """
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float64))
+        distances, idxs = self.tree.query(queries, k=1)
+        return distances, idxs.astype(np.int64)
+
+    def nearest(self, queries: np.ndarray) -> np.ndarray:
+        """Return the row index of the nearest point for each query."""
+        return self.query(queries)[1]
@@ -0,0 +1,191 @@
+"""Array-backed connectivity of a triangle mesh.
+
+    Edges, edge-face incidence, vertex-vertex adjacency (CSR) and ordered
+    boundary loops are derived from the (f, 3) face array in a few sorting
+    and scatter passes, with no per-element Python objects. Building the
+    topology peaks at about 120 bytes per face and keeps about 60, so a
+    three-million-face scan is done in under 400 MB.
+
+"""
+from typing import List, Optional
+
+import numpy as np
+
+
+def _index_dtype(n: int) -> type:
+    return np.int32 if n <= np.iinfo(np.int32).max else np.int64
+
+
+class MeshTopology:
+    """Edges and adjacency of a triangle mesh.
+
+    Half-edge `k` of face `f` runs from `faces[f, k]` to `faces[f, (k + 1) % 3]`.
+
+    Args:
+        faces: (f, 3) zero-based vertex indices.
+        n_vertices: number of vertices, one more than the largest index
+                    in `faces` by default.
+
+    Attributes:
+        edges: (e, 2) undirected edges as (low, high) vertex pairs, sorted.
+        face_edges: (f, 3) edge of each half-edge of each face.
+        edge_faces: (e, 2) faces on either side of each edge, -1 where an edge
+                    is on the boundary. Edges shared by more than two faces
+                    keep the first two.
+        edge_valence: (e,) number of faces using each edge.
+        indptr, indices: CSR vertex-vertex adjacency, the neighbors of vertex
+                         `v` are `indices[indptr[v] : indptr[v + 1]]`, sorted.
+    """
+
+    def __init__(self, faces: np.ndarray, n_vertices: Optional[int] = None):
+        self.faces = np.asarray(faces)
+        n_faces = self.faces.shape[0]
+        if n_vertices is None:
+            n_vertices = int(self.faces.max()) + 1 if n_faces else 0
+        self.n_vertices = n_vertices
+
+        # undirected key of every half-edge, in face-major order
+        start = self.faces.ravel()
+        end = self.faces[:, [1, 2, 0]].ravel()
+        key = np.minimum(start, end).astype(np.int64) * n_vertices
+        key += np.maximum(start, end)
+        del start, end
+
+        order = np.argsort(key, kind="stable")
+        key = key[order]
+        first = np.r_[True, key[1:] != key[:-1]]
+
+        # edge id of each half-edge, scattered back to face order
+        edge_dtype = _index_dtype(int(first.sum()))
+        he_edge = np.empty(order.shape[0], dtype=edge_dtype)
+        he_edge[order] = np.cumsum(first, dtype=edge_dtype) - 1
+        self.face_edges = he_edge.reshape(n_faces, 3)
+
+        edge_keys = key[first]
+        vertex_dtype = _index_dtype(n_vertices)
+        self.edges = np.empty((edge_keys.shape[0], 2), dtype=vertex_dtype)
+        self.edges[:, 0] = edge_keys // max(n_vertices, 1)
+        self.edges[:, 1] = edge_keys % max(n_vertices, 1)
+        del key, edge_keys
+
+        # half-edges are sorted by edge, so an edge's faces are a run of `order`
+        first_he = np.flatnonzero(first)
+        self.edge_valence = np.diff(np.r_[first_he, order.shape[0]]).astype(np.int32)
+        face_dtype = _index_dtype(n_faces)
+        self.edge_faces = np.full((first_he.shape[0], 2), -1, dtype=face_dtype)
+        self.edge_faces[:, 0] = order[first_he] // 3
+        shared = self.edge_valence > 1
+        self.edge_faces[shared, 1] = order[first_he[shared] + 1] // 3
+        del order, first, first_he
+
+        self.indptr, self.indices = self._adjacency()
+
+    def _adjacency(self):
+        """CSR vertex-vertex adjacency from the sorted edge list."""
+        low, high = self.edges[:, 0], self.edges[:, 1]
+        # (high, low) pairs first: for a given vertex its lower neighbors,
+        # already in increasing order, then its higher ones
+        src = np.concatenate([high, low])
+        dst = np.concatenate([low, high])
+        order = np.argsort(src, kind="stable")
+
+        counts = np.bincount(src, minlength=self.n_vertices)
+        indptr = np.zeros(self.n_vertices + 1, dtype=np.int64)
+        np.cumsum(counts, out=indptr[1:])
+        return indptr, dst[order]
+
+    @property
+    def n_edges(self) -> int:
+        return self.edges.shape[0]
+
+    def neighbors(self, vertex: int) -> np.ndarray:
+        """Return the sorted neighbors of one vertex."""
+        return self.indices[self.indptr[vertex] : self.indptr[vertex + 1]]
+
+    def degree(self) -> np.ndarray:
+        """Return the number of neighbors of every vertex."""
+        return np.diff(self.indptr)
+
+    def adjacency_matrix(self, weights: Optional[np.ndarray] = None):
+        """Return the symmetric (n, n) scipy CSR matrix of the edges.
+
+        Args:
+            weights: (e,) value of each edge, 1 by default.
+        """
+        # scipy.sparse is slow to import, only pay for it when it is needed
+        from scipy import sparse
+
+        if weights is None:
+            weights = np.ones(self.n_edges)
+
+        low, high = self.edges[:, 0], self.edges[:, 1]
+        return sparse.coo_matrix(
+            (np.r_[weights, weights], (np.r_[low, high], np.r_[high, low])),
+            shape=(self.n_vertices, self.n_vertices),
+        ).tocsr()
+
+    def is_boundary_edge(self) -> np.ndarray:
+        """Return the (e,) mask of edges used by exactly one face."""
+        return self.edge_valence == 1
+
+    def is_boundary_vertex(self) -> np.ndarray:
+        """Return the (n,) mask of vertices on a boundary edge."""
+        mask = np.zeros(self.n_vertices, dtype=bool)
+        mask[self.edges[self.is_boundary_edge()].ravel()] = True
+        return mask
+
+    def boundary_loops(self) -> List[np.ndarray]:
+        """Return every boundary loop as its vertices in order, longest first.
+
+        A loop follows the winding of its faces and starts at its smallest
+        vertex. The loops are found with pointer jumping over the boundary
+        half-edges, so the work is vectorized whatever their number or size.
+
+        Raises:
+            ValueError: when the boundary edges do not form closed loops,
+                        e.g. around faces of inconsistent orientation.
+        """
+        boundary = self.is_boundary_edge()
+        if not boundary.any():
+            return []
+
+        # the one half-edge of every boundary edge, in the face's direction
+        edge = np.flatnonzero(boundary)
+        face = self.edge_faces[edge, 0].astype(np.int64)
+        corner = np.argmax(self.face_edges[face] == edge[:, None], axis=1)
+        start = self.faces[face, corner].astype(np.int64)
+        end = self.faces[face, (corner + 1) % 3].astype(np.int64)
+        m = start.shape[0]
+
+        # pair the k-th half-edge into a vertex with the k-th one out of it
+        out_order = np.argsort(start, kind="stable")
+        in_order = np.argsort(end, kind="stable")
+        if not np.array_equal(start[out_order], end[in_order]):
+            raise ValueError("The boundary edges do not form closed loops.")
+        following = np.empty(m, dtype=np.int64)
+        following[in_order] = out_order
+
+        steps = max(int(np.ceil(np.log2(m))), 1)
+
+        # label each loop by its smallest (start vertex, half-edge) pair
+        label = start * m + np.arange(m)
+        jump = following.copy()
+        for _ in range(steps):
+            np.minimum(label, label[jump], out=label)
+            jump = jump[jump]
+        head = label % m
+
+        # cut each loop in front of its head and rank by distance to the cut
+        is_last = following == head[following]
+        nxt = np.where(is_last, np.arange(m), following)
+        to_end = np.where(is_last, 0, 1)
+        for _ in range(steps):
+            to_end = to_end + to_end[nxt]
+            nxt = nxt[nxt]
+
+        order = np.lexsort((-to_end, label))
+        labels = label[order]
+        cuts = np.flatnonzero(labels[1:] != labels[:-1]) + 1
+        loops = np.split(start[order], cuts)
+
+        return sorted(loops, key=len, reverse=True)
@@ -1,10 +1,13 @@
 from cmath import atan, exp, phase, pi, rect, sqrt
 from pathlib import Path
 import sys
-from typing import List
+from typing import Union
 
 import numpy as np
 
+sys.path.insert(0, Path(__file__).resolve().parents[1].as_posix())
+from mesh import read_obj, write_obj
+
 
 def read_keypoints(fpath: Path):
     keypoints = {}
@@ -23,18 +26,6 @@ def change_fname(fname: Path):
     return data_dir / "transformed" / name
 
 
-def read_obj(fname: Path):
-    with open(fname) as f:
-        fl = f.readlines()
-    faces = [line for line in fl if line[0] == "f"]
-    fl = [line.strip().split(" ") for line in fl if (line[0] == "v" or line[0] == "vt")]
-    vertices = np.array([[float(x) for x in line[1:]] for line in fl if line[0] == "v"])
-    textures = np.array(
-        [[float(x) for x in line[1:]] for line in fl if line[0] == "vt"]
-    )
-    return vertices, textures, faces
-
-
 def principal_arg(z):
     """
     Compute the principal argument of a complex number z.
@@ -69,33 +60,37 @@ def mobius(z: complex, origin: complex, theta: float):
 
 
 def run_mobius(
-    z: complex,
+    z: Union[complex, np.ndarray],
     z1: complex,
     z2: complex,
     z3: complex,
     w1: complex,
     w2: complex,
     w3: complex,
-):
+) -> Union[complex, np.ndarray]:
     """
     (z, z1; z2, z3) = (w, w1; w2, w3)
     ((z - z2) * (z1 - z3)) / ((z - z3) * (z1 - z2)) = ((w - w2) * (w1 - w3)) / ((w - w3) * (w1 - w2))
     w = ((w2 * (w1 - w3) * (z - z3) * (z1 - z2) - w3 * (w1 - w2) * (z - z2) * (z1 - z3)) / ((z - z3) * (z1 - z2)))
+
+    `z` may be a complex array, which is mapped element-wise in one pass.
     """
-    num: complex = w2 * (w1 - w3) * (z - z3) * (z1 - z2) - w3 * (w1 - w2) * (z - z2) * (
-        z1 - z3
-    )
-    den: complex = (z - z3) * (z1 - z2)
-    w: complex
-    if z == z3:
-        w = w3
-    elif z == z2:
-        w = w2
-    elif z == z1:
-        w = w1
-    else:
-        w = num / den
-    return w
+    scalar = np.ndim(z) == 0
+    z = np.atleast_1d(np.asarray(z, dtype=np.complex128))
+
+    # w = (a * (z - z3) - b * (z - z2)) / (c * (z - z3))
+    a = w2 * (w1 - w3) * (z1 - z2)
+    b = w3 * (w1 - w2) * (z1 - z3)
+    c = z1 - z2
+    z_z3 = z - z3
+    with np.errstate(divide="ignore", invalid="ignore"):
+        w = (a * z_z3 - b * (z - z2)) / (c * z_z3)
+
+    # the fixed points, z3 last so it wins like it did per vertex
+    w[z == z1] = w1
+    w[z == z2] = w2
+    w[z == z3] = w3
+    return complex(w[0]) if scalar else w
 
 
 def run_mobius_function(keypoints, textures, vertices):
@@ -104,6 +99,9 @@ def run_mobius_function(keypoints, textures, vertices):
     w1 = complex(-1, 1) / (2 * sqrt(2))
     w2 = complex(+1, 1) / (2 * sqrt(2))
     w3 = complex(0, 0)
+
+    The textures and the first two columns of the vertices are overwritten
+    with the map.
     """
     z1 = complex(*tuple(textures[keypoints["left_eye"], :]))
     z2 = complex(*tuple(textures[keypoints["right_eye"], :]))
@@ -113,29 +111,18 @@ def run_mobius_function(keypoints, textures, vertices):
     w2 = complex(+1, 1) / (2 * sqrt(2))
     w3 = complex(0, 0)
 
-    for i, t in enumerate(textures):
-        z = complex(t[0], t[1])
-        w = run_mobius(z, z1=z1, z2=z2, z3=z3, w1=w1, w2=w2, w3=w3)
-        print(f"z: {z}\tw: {w}")
-        textures[i][0] = w.real
-        textures[i][1] = w.imag
-        vertices[i][0] = w.real
-        vertices[i][1] = w.imag
-    return textures, vertices
+    z = textures[:, 0] + 1j * textures[:, 1]
+    w = run_mobius(z, z1=z1, z2=z2, z3=z3, w1=w1, w2=w2, w3=w3)
 
+    textures[:, 0] = w.real
+    textures[:, 1] = w.imag
+    vertices[:, 0] = w.real
+    vertices[:, 1] = w.imag
+    return textures, vertices
 
-def write_object(vertices: np.ndarray, textures: np.ndarray, faces: List[str]):
-    with open("source.obj", "w") as s:
-        for v in vertices:
-            row = "v " + " ".join([str(x) for x in v]) + "\n"
-            s.write(row)
-
-        for vt in textures:
-            row = "vt " + " ".join([str(x) for x in vt]) + "\n"
-            s.write(row)
 
-        for f in faces:
-            s.write(f)
+def write_object(vertices: np.ndarray, textures: np.ndarray, faces: np.ndarray):
+    write_obj("source.obj", vertices=vertices, textures=textures, faces=faces)
 
 
 if __name__ in "__main__":
@@ -143,7 +130,7 @@ if __name__ in "__main__":
         print("NO\n")
         sys.exit(1)
 
-    vert, text, face = read_obj(sys.argv[1])
+    vert, text, face, _, _ = read_obj(sys.argv[1])
     keypoints = read_keypoints(sys.argv[2])
 
     text_, vert_ = run_mobius_function(keypoints, text, vert)
@@ -0,0 +1,202 @@
+"""Pick the decimation target from a memory and time budget
+
+    Author: Dan Billmann
+
+    The harmonic map solver's peak memory and runtime grow with the face
+    count of the collapsed mesh. `qecd.py --calibrate` runs the solver on a
+    few decimation levels of a real mesh and stores what it measured in a
+    calibration table. The costs are then fitted as
+
+        memory  = a + b * faces
+        seconds = c * faces ** p
+
+    and the target face count is the largest one both fits keep under budget.
+
+"""
+from collections import namedtuple
+import json
+import os
+from pathlib import Path
+import platform
+import subprocess
+import sys
+import tempfile
+from typing import List, Optional, Tuple
+import warnings
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+CALIBRATION_FPATH = Path(__file__).resolve().parent / "calibration.json"
+SOLVER = ROOT / "HarmonicMap" / "bin" / "map"
+# leave room for the rest of the system when no budget is given
+AVAILABLE_MEMORY_FRACTION = 0.75
+
+# one solver run: face count, peak resident memory in bytes, wall seconds,
+# and the solver and host it was measured with
+Measurement = namedtuple(
+    "Measurement", ("faces", "peak_bytes", "seconds", "solver", "host")
+)
+CostModel = namedtuple("CostModel", ("a", "b", "c", "p"))
+# assumed when the solver cannot be calibrated, on the safe side of what
+# bin/map was measured at (4 MiB + 1 KiB per face, 17s at 40000 faces)
+FALLBACK_MODEL = CostModel(a=256 * 2**20, b=4096, c=2e-6, p=1.6)
+
+# run in a fresh interpreter so RUSAGE_CHILDREN only covers the solver
+_MEASURE = """
+import resource, subprocess, sys, time
+t = time.perf_counter()
+subprocess.run(sys.argv[1:], check=True, stdout=subprocess.DEVNULL)
+seconds = time.perf_counter() - t
+print(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss, seconds)
+"""
+
+
+def measure_solver(
+    fpath_in: Path, fpath_out: Path, solver: Path = SOLVER
+) -> Tuple[int, float]:
+    """Run the solver once and return its peak memory (bytes) and runtime."""
+    # it runs from its own tree, see cwd below
+    solver = Path(solver).resolve()
+
+    # Python solvers, e.g. HarmonicMap/sparse_map.py, run in this interpreter
+    command = [str(solver)]
+    if solver.suffix == ".py":
+        command.insert(0, sys.executable)
+
+    out = subprocess.run(
+        [sys.executable, "-c", _MEASURE, *command, str(fpath_in), str(fpath_out)],
+        cwd=solver.parents[1],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    maxrss, seconds = out.stdout.split()
+
+    # ru_maxrss is in bytes on macOS, KiB elsewhere
+    peak_bytes = int(maxrss) if sys.platform == "darwin" else int(maxrss) * 1024
+    return peak_bytes, float(seconds)
+
+
+def solver_key(solver: Path = SOLVER) -> str:
+    """The solver as recorded in the table, its absolute path."""
+    return str(Path(solver).resolve())
+
+
+def _read_rows(fpath: Path) -> List[dict]:
+    if not fpath.exists():
+        return []
+
+    with open(fpath) as f:
+        rows = json.load(f)
+    if not isinstance(rows, list) or not all(isinstance(r, dict) for r in rows):
+        raise ValueError("expected a list of measurements")
+    return rows
+
+
+def read_table(
+    fpath: Path = CALIBRATION_FPATH, solver: Path = SOLVER
+) -> List[Measurement]:
+    """Read the measurements of `solver` on this host.
+
+    Rows of other solvers or hosts are ignored. The table is empty when the
+    file is missing or unreadable.
+    """
+    try:
+        rows = _read_rows(fpath)
+        host, solver = platform.node(), solver_key(solver)
+        return [
+            Measurement(**row)
+            for row in rows
+            if row.get("solver") == solver and row.get("host") == host
+        ]
+    except (ValueError, TypeError) as e:
+        warnings.warn(f"Ignoring the unreadable calibration table {fpath}: {e}")
+        return []
+
+
+def write_table(table: List[Measurement], fpath: Path = CALIBRATION_FPATH):
+    """Store the measurements, replacing those of the same solver and host.
+
+    The table is written next to `fpath` and moved into place in one step,
+    a run reading it meanwhile sees either the old or the new one, never a
+    partial file.
+    """
+    try:
+        rows = _read_rows(fpath)
+    except ValueError:
+        rows = []
+
+    measured = {(m.solver, m.host) for m in table}
+    rows = [r for r in rows if (r.get("solver"), r.get("host")) not in measured]
+    rows.extend(m._asdict() for m in table)
+
+    with tempfile.NamedTemporaryFile(
+        "w", dir=fpath.parent, prefix=f".{fpath.name}.", delete=False
+    ) as f:
+        json.dump(rows, f, indent=2)
+
+    os.replace(f.name, fpath)
+
+
+def fit(table: List[Measurement]) -> CostModel:
+    """Fit the memory and runtime models to the measurements."""
+    if len({m.faces for m in table}) < 2:
+        raise ValueError("calibration needs measurements at two or more face counts")
+
+    faces = np.array([m.faces for m in table], dtype=float)
+    peak = np.array([m.peak_bytes for m in table], dtype=float)
+    seconds = np.array([m.seconds for m in table], dtype=float)
+
+    b, a = np.polyfit(faces, peak, 1)
+    p, log_c = np.polyfit(np.log(faces), np.log(np.maximum(seconds, 1e-3)), 1)
+
+    return CostModel(a, b, np.exp(log_c), p)
+
+
+def available_memory() -> int:
+    """Bytes of memory currently available, total memory where unknown."""
+    page = os.sysconf("SC_PAGE_SIZE")
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * page
+    except (ValueError, OSError):
+        # macOS only reports the total
+        return os.sysconf("SC_PHYS_PAGES") * page
+
+
+def budget_targetfacenum(
+    targetfacenum: int,
+    model: CostModel,
+    memory_budget: Optional[int] = None,
+    time_budget: Optional[float] = None,
+) -> int:
+    """Return the largest face count up to `targetfacenum` within budget.
+
+    Args:
+        targetfacenum: the face count wanted when resources allow it.
+        model: the fitted solver costs.
+        memory_budget: bytes the solver may use, a share of the available
+                       memory by default.
+        time_budget: seconds the solver may run, unbounded by default.
+
+    Raises:
+        ValueError: when the budget cannot fit any mesh, so the run stops
+                    here instead of being killed in the mapping stage.
+    """
+    if memory_budget is None:
+        memory_budget = int(available_memory() * AVAILABLE_MEMORY_FRACTION)
+
+    faces = float(targetfacenum)
+    if model.b > 0:
+        faces = min(faces, (memory_budget - model.a) / model.b)
+
+    if time_budget is not None and model.p > 0:
+        faces = min(faces, (time_budget / model.c) ** (1 / model.p))
+
+    if faces < 1:
+        raise ValueError(
+            f"no face count fits in {memory_budget} bytes"
+            + (f" and {time_budget} seconds" if time_budget is not None else "")
+        )
+
+    return int(faces)
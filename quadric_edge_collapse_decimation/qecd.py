@@ -5,20 +5,63 @@
     We need to reduce the density of the mesh
 
 """
+from argparse import ArgumentParser
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from pathlib import Path
+import platform
+import subprocess
 import sys
+from tempfile import TemporaryDirectory
 from typing import Dict, List, Optional, Union
+import warnings
 
 import numpy as np
-import pymeshlab
 
-MS = pymeshlab.MeshSet()
+sys.path.insert(0, Path(__file__).resolve().parents[1].as_posix())
+from mesh import MeshTopology, ObjMesh, PointIndex, read_obj, read_point_file
+
+from calibration import (
+    FALLBACK_MODEL,
+    SOLVER,
+    Measurement,
+    budget_targetfacenum,
+    fit,
+    measure_solver,
+    read_table,
+    solver_key,
+    write_table,
+)
+
+CONFIG_FPATH = Path(__file__).resolve().parents[1] / "config.yaml"
+TARGETFACENUM = 30000
+# decimation levels the solver is measured at by --calibrate
+CALIBRATION_FACES = (40000, 20000, 10000, 5000)
+
+# index: PointIndex over the parent's vertices before decimation
+# vertices, uv, faces, topology: the decimated parent, vertices are XYZ (+ RGB)
+CutParent = namedtuple("CutParent", ("index", "vertices", "uv", "faces", "topology"))
+
+# created by get_mesh_set() on first use, importing pymeshlab is not free
+MS = None
 M: np.ndarray
 NT: np.ndarray
 LE: np.ndarray
 RE: np.ndarray
 
 
+def get_config_targetfacenum(fpath: Path = CONFIG_FPATH) -> int:
+    """Read `qecd.targetfacenum` from config.yaml, TARGETFACENUM if unset."""
+    if not fpath.exists():
+        return TARGETFACENUM
+
+    from box import Box
+
+    config = Box.from_yaml(filename=fpath)
+    return int(config.get("qecd", {}).get("targetfacenum", TARGETFACENUM))
+
+
 def get_collapsed_fpath(fname: Path, z: bool = True, **kwargs) -> str:
     extension = kwargs.get("extension", "")
 
@@ -28,6 +71,8 @@ def get_collapsed_fpath(fname: Path, z: bool = True, **kwargs) -> str:
         data_dir = fname.parent
 
     new_path = data_dir / "collapsed" / fname.name
+    if kwargs.get("level") is not None:
+        new_path = data_dir / "collapsed" / str(kwargs.get("level")) / fname.name
 
     if extension != "":
         if "." in extension:
@@ -38,18 +83,41 @@ def get_collapsed_fpath(fname: Path, z: bool = True, **kwargs) -> str:
     return new_path.as_posix()
 
 
-def find_new_points(kp: Dict[str, Dict[str, Union[np.ndarray, int]]]):
-    vm = MS.current_mesh().vertex_matrix()
+def get_mesh_set():
+    """Return the module-level MeshSet, importing pymeshlab on first use."""
+    global MS
+    if MS is None:
+        import pymeshlab
+
+        MS = pymeshlab.MeshSet()
+    return MS
+
 
-    for k, v in kp.items():
-        voxel = v[:3]
-        # Initialize the closest vertex index and distance
-        # np.apply_along_axis(np.linalg.norm, 1, textures - b)
-        dist = np.linalg.norm(vm - voxel, axis=1)
-        smallest = np.argmin(dist)
-        kp[k] = smallest
+def remap_points(
+    index: PointIndex, *point_sets: Dict[str, np.ndarray]
+) -> List[Dict[str, int]]:
+    """Map every named point to its nearest vertex with one batched query.
 
-    return kp
+    Args:
+        index: a PointIndex over the (decimated) vertex matrix.
+        point_sets: name -> xyz dictionaries, e.g. the keypoints and metrics.
+
+    Returns:
+        One name -> vertex index dictionary per point set.
+    """
+    names = [name for points in point_sets for name in points]
+    if not names:
+        return [{} for _ in point_sets]
+
+    voxels = np.array([v[:3] for points in point_sets for v in points.values()])
+    idxs = iter(index.nearest(voxels).tolist())
+
+    return [{k: next(idxs) for k in points} for points in point_sets]
+
+
+def find_new_points(kp: Dict[str, Dict[str, Union[np.ndarray, int]]]):
+    index = PointIndex(get_mesh_set().current_mesh().vertex_matrix())
+    return remap_points(index, kp)[0]
 
 
 def get_point_file(fpath_obj: Path, dir: str):
@@ -65,14 +133,6 @@ def get_dirpath_files(dirpath: Path, fpath_obj: Path, dir: str):
     return new_path
 
 
-def extract_points(lines: List[str]):
-    keypoints = {}
-    lines = [line.strip().split(" ") for line in lines]
-    for l in lines:
-        keypoints[l[0]] = np.array([float(i) for i in l[1:]])
-    return keypoints
-
-
 def read_points(fpath_obj: Path, dir: str, dirpath_points: Optional[Path] = None):
     if "source" in fpath_obj.as_posix():
         stem = "source.txt"
@@ -83,11 +143,7 @@ def read_points(fpath_obj: Path, dir: str, dirpath_points: Optional[Path] = None
     fpath_obj = fpath_obj.with_stem(stem)
     pfile = get_point_file(fpath_obj=fpath_obj, dir=dir)
 
-    lines: List[str]
-    with open(pfile) as f:
-        lines = f.readlines()
-
-    return extract_points(lines)
+    return read_point_file(pfile)
 
 
 def qecd(fpath_obj: Path, targetfacenum: int = 30000):
@@ -99,22 +155,491 @@ def qecd(fpath_obj: Path, targetfacenum: int = 30000):
     LE = kp["left_eye"]
     RE = kp["right_eye"]
 
+    MS = get_mesh_set()
+    # the MeshSet lives as long as the process, drop the previous mesh
+    MS.clear()
     MS.load_new_mesh(fpath_obj.as_posix())
     # M = MS.current_mesh().vertex_matrix()
+
+    return decimate_and_save(MS, fpath_obj, kp, mp, targetfacenum)
+
+
+def decimate_and_save(
+    MS, fpath_obj: Path, kp, mp, targetfacenum: int, **save_kwargs
+) -> str:
+    """Decimate the current mesh, remap the points and write everything out."""
     MS.meshing_decimation_quadric_edge_collapse_with_texture(
         targetfacenum=targetfacenum, preserveboundary=True
     )
+    return save_collapsed(MS, fpath_obj, kp, mp, **save_kwargs)
+
 
+def save_collapsed(MS, fpath_obj: Path, kp, mp, **save_kwargs) -> str:
+    """Remap the points onto the current mesh and write everything out."""
     fpath_collapsed = get_collapsed_fpath(fpath_obj)
     # M = MS.current_mesh().vertex_matrix()
 
-    new_kp = find_new_points(kp)
-    new_mp = find_new_points(mp)
+    # index the decimated vertices once for both point sets
+    index = PointIndex(MS.current_mesh().vertex_matrix())
+    new_kp, new_mp = remap_points(index, kp, mp)
 
     write_points(new_kp, fpath_obj=fpath_obj, dir="keypoints")
     write_points(new_mp, fpath_obj=fpath_obj, dir="metrics")
-    MS.save_current_mesh(fpath_collapsed)
-    return
+    MS.save_current_mesh(fpath_collapsed, **save_kwargs)
+    return fpath_collapsed
+
+
+def mesh_from_arrays(
+    vertices: np.ndarray, textures: np.ndarray, faces: np.ndarray, flatten: bool = False
+):
+    """Build a pymeshlab.Mesh straight from the parsed/selected arrays.
+
+    Args:
+        vertices: (n, 3) xyz or (n, 6) xyz + rgb in [0, 1].
+        textures: (n, 2) per-vertex UVs.
+        faces: (m, 3) zero-based vertex indices.
+        flatten: set every z to 0, like scripts/flatten.sh does on the file.
+    """
+    import pymeshlab
+
+    xyz = np.array(vertices[:, :3], dtype=np.float64)
+    if flatten:
+        xyz[:, 2] = 0.0
+
+    colors = {}
+    if vertices.shape[1] >= 6:
+        rgba = np.ones((vertices.shape[0], 4))
+        rgba[:, :3] = vertices[:, 3:6]
+        colors["v_color_matrix"] = rgba
+
+    return pymeshlab.Mesh(
+        vertex_matrix=xyz,
+        face_matrix=np.asarray(faces, dtype=np.int32),
+        v_tex_coords_matrix=np.asarray(textures[:, :2], dtype=np.float64),
+        **colors,
+    )
+
+
+def qecd_arrays(
+    fpath_obj: Path,
+    submesh: ObjMesh,
+    targetfacenum: int = 30000,
+    flatten: bool = False,
+) -> str:
+    """Run QECD on a mesh held in memory, no OBJ is read.
+
+    Args:
+        fpath_obj: where boundary detection would have written the mesh,
+                   e.g. `data/boundary/custom_source.obj`. It only names the
+                   outputs, the same ones qecd() writes for that file.
+        submesh: the selected vertices, UVs and faces.
+        targetfacenum: the decimation target.
+        flatten: set every z to 0 before decimating.
+    """
+    kp = read_points(fpath_obj=fpath_obj, dir="keypoints")
+    mp = read_points(fpath_obj=fpath_obj, dir="metrics")
+
+    MS = get_mesh_set()
+    MS.clear()
+    MS.add_mesh(
+        mesh_from_arrays(
+            submesh.vertices, submesh.textures, submesh.faces, flatten=flatten
+        ),
+        fpath_obj.stem,
+    )
+    # the texture-aware decimation works on per-wedge UVs, as read from an OBJ
+    MS.compute_texcoord_transfer_vertex_to_wedge()
+
+    return decimate_and_save(
+        MS,
+        fpath_obj,
+        kp,
+        mp,
+        targetfacenum,
+        save_vertex_color=submesh.vertices.shape[1] >= 6,
+    )
+
+
+def get_cut_parent(MS, vertices: np.ndarray) -> CutParent:
+    """Keep the current (decimated) mesh to cut boundary variants from.
+
+    Args:
+        MS: the MeshSet holding the decimated parent.
+        vertices: the parent's vertices before decimation, XYZ (+ RGB).
+    """
+    mesh = MS.current_mesh()
+    decimated = mesh.vertex_matrix()
+    if vertices.shape[1] >= 6:
+        decimated = np.hstack([decimated, mesh.vertex_color_matrix()[:, :3]])
+
+    # the boundary meshes carry one UV per vertex
+    MS.compute_texcoord_transfer_wedge_to_vertex()
+    faces = mesh.face_matrix()
+    return CutParent(
+        PointIndex(vertices[:, :3]),
+        decimated,
+        mesh.vertex_tex_coord_matrix(),
+        faces,
+        MeshTopology(faces, decimated.shape[0]),
+    )
+
+
+def is_disk(faces: np.ndarray) -> bool:
+    """Whether a face set is a manifold with exactly one boundary loop."""
+    topology = MeshTopology(faces)
+    if topology.edge_valence.max() > 2:
+        return False
+
+    # a vertex on more than two boundary edges pinches two loops together
+    boundary = topology.edges[topology.is_boundary_edge()].ravel()
+    if np.bincount(boundary).max() > 2:
+        return False
+
+    try:
+        return len(topology.boundary_loops()) == 1
+    except ValueError:
+        return False
+
+
+def face_components(topology: MeshTopology, mask: np.ndarray) -> np.ndarray:
+    """Label the pieces of the masked faces, -1 for the faces outside the mask.
+
+    Faces are connected when they share an edge.
+    """
+    from scipy import sparse
+    from scipy.sparse.csgraph import connected_components
+
+    # edge_faces is -1 on the boundary, mask[-1] is then ignored
+    pairs = topology.edge_faces[topology.edge_faces[:, 1] >= 0]
+    pairs = pairs[mask[pairs[:, 0]] & mask[pairs[:, 1]]]
+
+    n_faces = topology.faces.shape[0]
+    graph = sparse.coo_matrix(
+        (np.ones(pairs.shape[0]), (pairs[:, 0], pairs[:, 1])),
+        shape=(n_faces, n_faces),
+    )
+    _, labels = connected_components(graph, directed=False)
+    return np.where(mask, labels, -1)
+
+
+def cut_variant_faces(
+    parent: CutParent, variant: ObjMesh, max_passes: int = 8
+) -> Optional[np.ndarray]:
+    """Select the faces of the decimated parent that make up a variant.
+
+    A variant is the parent's selection with a chunk taken out, so its
+    vertices are a subset of the parent's before decimation. A decimated
+    face belongs to the variant when the parent vertex nearest to its
+    centroid does. Along the jagged cut this leaves stray faces, single
+    face holes and pinched vertices, so each pass keeps the largest piece,
+    fills the holes that do not reach the parent's boundary and drops the
+    faces around pinched vertices, until the selection is a disk.
+
+    Returns:
+        The selected rows of `parent.faces`, None when the variant is not
+        cut out of the parent, or either it or its cut is not a topological
+        disk.
+    """
+    distances, ids = parent.index.query(variant.vertices[:, :3])
+    if distances.max() > 0 or not is_disk(variant.faces):
+        return None
+
+    in_variant = np.zeros(len(parent.index), dtype=bool)
+    in_variant[ids] = True
+
+    topology = parent.topology
+    centroids = parent.vertices[:, :3][parent.faces].mean(axis=1)
+    mask = in_variant[parent.index.nearest(centroids)]
+
+    # faces with an edge on the parent's boundary, the chunk may reach it
+    on_boundary = np.zeros(parent.faces.shape[0], dtype=bool)
+    on_boundary[topology.edge_faces[topology.is_boundary_edge(), 0]] = True
+
+    for _ in range(max_passes):
+        if not mask.any():
+            return None
+
+        labels = face_components(topology, mask)
+        mask = labels == np.argmax(np.bincount(labels[mask]))
+
+        labels = face_components(topology, ~mask)
+        outside = np.unique(labels[on_boundary & ~mask])
+        mask |= ~mask & ~np.isin(labels, outside)
+
+        selected = np.flatnonzero(mask)
+        if is_disk(parent.faces[selected]):
+            return selected
+
+        # a vertex on more than two boundary edges of the cut is pinched
+        cut = MeshTopology(parent.faces[selected], parent.vertices.shape[0])
+        counts = np.bincount(
+            cut.edges[cut.is_boundary_edge()].ravel(),
+            minlength=parent.vertices.shape[0],
+        )
+        mask &= ~(counts[parent.faces] > 2).any(axis=1)
+
+    return None
+
+
+def qecd_cut(fpath_obj: Path, parent: CutParent, variant: ObjMesh) -> Optional[str]:
+    """Cut a boundary variant out of its decimated parent instead of decimating it.
+
+    The variant's vertices are the parent's decimated vertices, bit for bit,
+    so later stages can recognise them (see HarmonicMap/sparse_map.py -v).
+
+    Returns:
+        The collapsed mesh written, None when the variant cannot be cut out
+        of the parent.
+    """
+    selected = cut_variant_faces(parent, variant)
+    if selected is None:
+        return None
+
+    kp = read_points(fpath_obj=fpath_obj, dir="keypoints")
+    mp = read_points(fpath_obj=fpath_obj, dir="metrics")
+
+    used, faces = np.unique(parent.faces[selected], return_inverse=True)
+    MS = get_mesh_set()
+    MS.clear()
+    MS.add_mesh(
+        mesh_from_arrays(
+            parent.vertices[used], parent.uv[used], faces.reshape(-1, 3)
+        ),
+        fpath_obj.stem,
+    )
+    MS.compute_texcoord_transfer_vertex_to_wedge()
+
+    return save_collapsed(
+        MS, fpath_obj, kp, mp, save_vertex_color=parent.vertices.shape[1] >= 6
+    )
+
+
+def get_parent_fpath(fpath: Path) -> Path:
+    """The consistent boundary a variant comes from, `fpath` for a boundary.
+
+    Variants are named `<boundary>_<chunk>_<side>.obj`, e.g.
+    `middle_chin_source.obj` of `middle_source.obj`.
+    """
+    parts = fpath.stem.split("_")
+    if len(parts) < 3:
+        return fpath
+
+    return fpath.with_name(f"{parts[0]}_{parts[-1]}{fpath.suffix}")
+
+
+def qecd_variants(fpaths: List[Path], targetfacenum: int = 30000) -> List[str]:
+    """Decimate each consistent boundary once and cut its variants out of it.
+
+    The consistent boundaries are always decimated to `targetfacenum`. A
+    `<boundary>_<chunk>` variant is cut out of the decimation of its own
+    `<boundary>` when that is among `fpaths` too, and decimated on its own
+    when it is not or when its cut is not a topological disk.
+
+    Returns:
+        The collapsed meshes written, in the order of `fpaths`.
+    """
+    parent_fpaths = {fpath: get_parent_fpath(fpath) for fpath in fpaths}
+    parents: Dict[Path, CutParent] = {}
+    collapsed = {}
+    for fpath in fpaths:
+        if parent_fpaths[fpath] != fpath:
+            continue
+
+        collapsed[fpath] = qecd_one(fpath, targetfacenum=targetfacenum)
+        vertices = read_obj(fpath).vertices
+        parents[fpath] = get_cut_parent(get_mesh_set(), vertices)
+
+    for fpath in fpaths:
+        if fpath in collapsed:
+            continue
+
+        parent = parents.get(parent_fpaths[fpath])
+        if parent is not None:
+            collapsed[fpath] = qecd_cut(fpath, parent, read_obj(fpath))
+        if collapsed.get(fpath) is not None:
+            print(f"Cut {fpath} out of {parent_fpaths[fpath]}")
+        else:
+            collapsed[fpath] = qecd_one(fpath, targetfacenum=targetfacenum)
+
+    return [collapsed[fpath] for fpath in fpaths]
+
+
+def qecd_pyramid(fpath_obj: Path, levels: List[int]) -> List[str]:
+    """Decimate one mesh to several face counts from a single load.
+
+    Every level is decimated from the previous, finer one. A level is
+    written to `collapsed/<faces>/` with its keypoints and metric points
+    remapped into `keypoints/<faces>/` and `metrics/<faces>/`.
+    """
+    kp = read_points(fpath_obj=fpath_obj, dir="keypoints")
+    mp = read_points(fpath_obj=fpath_obj, dir="metrics")
+
+    MS = get_mesh_set()
+    MS.clear()
+    MS.load_new_mesh(fpath_obj.as_posix())
+
+    fpaths = []
+    for faces in sorted(levels, reverse=True):
+        MS.meshing_decimation_quadric_edge_collapse_with_texture(
+            targetfacenum=faces, preserveboundary=True
+        )
+
+        index = PointIndex(MS.current_mesh().vertex_matrix())
+        new_kp, new_mp = remap_points(index, kp, mp)
+        write_points(new_kp, fpath_obj=fpath_obj, dir=f"keypoints/{faces}")
+        write_points(new_mp, fpath_obj=fpath_obj, dir=f"metrics/{faces}")
+
+        fpath_collapsed = get_collapsed_fpath(fpath_obj, level=faces)
+        Path(fpath_collapsed).parent.mkdir(parents=True, exist_ok=True)
+        MS.save_current_mesh(fpath_collapsed)
+        fpaths.append(fpath_collapsed)
+
+    return fpaths
+
+
+def qecd_one(
+    fpath_obj: Path, targetfacenum: int = 30000, levels: Optional[List[int]] = None
+) -> Union[str, List[str]]:
+    print(f"Running QECD on {fpath_obj}")
+    if levels:
+        return qecd_pyramid(fpath_obj=fpath_obj, levels=levels)
+    return qecd(fpath_obj=fpath_obj, targetfacenum=targetfacenum)
+
+
+def calibrate(
+    fpath_obj: Path, face_counts=CALIBRATION_FACES, solver: Path = SOLVER
+) -> List[Measurement]:
+    """Measure the harmonic map solver on decimation levels of one mesh.
+
+    Each level is decimated from the previous (larger) one, written to a
+    temporary directory and mapped once. The measurements are stored as the
+    calibration table read by later runs.
+    """
+    MS = get_mesh_set()
+    MS.clear()
+    MS.load_new_mesh(fpath_obj.as_posix())
+
+    table = []
+    with TemporaryDirectory() as tmpdir:
+        for faces in sorted(face_counts, reverse=True):
+            MS.meshing_decimation_quadric_edge_collapse_with_texture(
+                targetfacenum=faces, preserveboundary=True
+            )
+            fpath_in = Path(tmpdir) / f"{faces}.obj"
+            MS.save_current_mesh(fpath_in.as_posix())
+
+            peak_bytes, seconds = measure_solver(
+                fpath_in, Path(tmpdir) / f"{faces}_mapped.obj", solver=solver
+            )
+            m = Measurement(
+                MS.current_mesh().face_number(),
+                peak_bytes,
+                seconds,
+                solver_key(solver),
+                platform.node(),
+            )
+            print(f"{m.faces} faces: {m.peak_bytes / 2**20:.1f} MiB, {m.seconds:.2f}s")
+            table.append(m)
+
+    # only store a table later runs can fit
+    fit(table)
+    write_table(table)
+    return table
+
+
+def resolve_targetfacenum(
+    targetfacenum: Optional[int] = None,
+    memory_budget: Optional[int] = None,
+    time_budget: Optional[float] = None,
+    fpath_obj: Optional[Path] = None,
+    solver: Path = SOLVER,
+) -> int:
+    """Return the decimation target, shrunk to fit the budgets.
+
+    Without a calibration table for `solver` on this host, one is built from
+    `fpath_obj` first if the solver exists. When that is not possible the
+    costs are assumed (calibration.FALLBACK_MODEL) and the default target
+    stays at TARGETFACENUM, config.yaml's target is only used once the
+    solver has been measured.
+
+    Args:
+        targetfacenum: the wanted face count, config.yaml's by default.
+        memory_budget: bytes, see calibration.budget_targetfacenum.
+        time_budget: seconds, see calibration.budget_targetfacenum.
+        fpath_obj: the mesh to calibrate on when there is no table yet.
+        solver: the harmonic map solver to calibrate.
+    """
+    table = read_table(solver=solver)
+    if not table and fpath_obj is not None and not Path(solver).exists():
+        print(f"No calibration table and {solver} is not built, not calibrating")
+    elif not table and fpath_obj is not None:
+        print(f"No calibration table, calibrating {solver} on {fpath_obj}")
+        try:
+            table = calibrate(fpath_obj, solver=solver)
+        except subprocess.CalledProcessError as e:
+            print(f"Calibration failed, the solver exited with {e.returncode}")
+        except (OSError, ValueError) as e:
+            print(f"Calibration failed: {e}")
+
+    if not table:
+        warnings.warn(
+            f"No calibration table for {solver} on this host, the decimation "
+            "target is budgeted on assumed solver costs. Run "
+            "`qecd.py --calibrate --solver <solver> <obj>` to measure them.",
+            stacklevel=2,
+        )
+        model = FALLBACK_MODEL
+        if targetfacenum is None:
+            targetfacenum = TARGETFACENUM
+    else:
+        model = fit(table)
+        if targetfacenum is None:
+            targetfacenum = get_config_targetfacenum()
+
+    return budget_targetfacenum(
+        targetfacenum,
+        model,
+        memory_budget=memory_budget,
+        time_budget=time_budget,
+    )
+
+
+def collect_obj_files(paths: List[Path]) -> List[Path]:
+    """Expand directories into the .obj files they contain, in name order."""
+    fpaths = []
+    for path in paths:
+        if path.is_dir():
+            fpaths.extend(sorted(path.glob("*.obj")))
+        else:
+            fpaths.append(path)
+
+    return fpaths
+
+
+def qecd_many(
+    fpaths: List[Path],
+    targetfacenum: int = 30000,
+    workers: int = 1,
+    levels: Optional[List[int]] = None,
+    cut_variants: bool = False,
+) -> List[Union[str, List[str]]]:
+    """Decimate several meshes in one process, or spread them over a pool.
+
+    Every process loads pymeshlab and creates its MeshSet once, then reuses
+    it for each of its meshes. With `levels`, each mesh becomes a pyramid
+    (see qecd_pyramid) instead of a single collapsed mesh. With
+    `cut_variants`, boundary variants are cut out of their parent's
+    decimation (see qecd_variants), in this process.
+    """
+    if cut_variants and not levels:
+        return qecd_variants(fpaths, targetfacenum=targetfacenum)
+
+    run = partial(qecd_one, targetfacenum=targetfacenum, levels=levels)
+    if workers <= 1 or len(fpaths) <= 1:
+        return [run(f) for f in fpaths]
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(fpaths))) as pool:
+        return list(pool.map(run, fpaths))
 
 
 def write_points(
@@ -123,14 +648,110 @@ def write_points(
     dir: str,
 ):
     pfile = get_point_file(fpath_obj, dir)
+    pfile.parent.mkdir(parents=True, exist_ok=True)
     with open(pfile, "w") as f:
         for k, v in keypoints.items():
             f.write(f"{k} {v}\n")
 
 
+def parse_cli():
+    ap = ArgumentParser()
+    ap.add_argument("paths", nargs="+", type=Path)
+    ap.add_argument(
+        "--targetfacenum",
+        "-f",
+        dest="targetfacenum",
+        type=int,
+        default=None,
+    )
+    ap.add_argument(
+        "--memory_budget",
+        "-m",
+        dest="memory_budget",
+        type=int,
+        default=None,
+    )
+    ap.add_argument(
+        "--time_budget",
+        "-t",
+        dest="time_budget",
+        type=float,
+        default=None,
+    )
+    ap.add_argument(
+        "--levels",
+        "-l",
+        dest="levels",
+        nargs="+",
+        type=int,
+        default=None,
+    )
+    ap.add_argument(
+        "--calibrate",
+        "-c",
+        dest="calibrate",
+        action="store_true",
+    )
+    ap.add_argument(
+        "--solver",
+        "-s",
+        dest="solver",
+        type=Path,
+        default=SOLVER,
+    )
+    ap.add_argument(
+        "--workers",
+        "-w",
+        dest="workers",
+        type=int,
+        default=1,
+    )
+    ap.add_argument(
+        "--cut_variants",
+        "-v",
+        dest="cut_variants",
+        action="store_true",
+    )
+    return ap.parse_args()
+
+
 if __name__ in "__main__":
-    if len(sys.argv) == 2:
-        qecd(fpath_obj=Path(sys.argv[1]))
-    else:
-        print("Usage: <qecd.py> <path_to_obj_file>")
+    args = parse_cli()
+    fpaths = collect_obj_files(args.paths)
+    if not fpaths:
+        print("Usage: <qecd.py> <path_to_obj_file_or_dir> [...]")
         sys.exit(1)
+
+    if args.calibrate:
+        calibrate(fpaths[0], solver=args.solver)
+        sys.exit(0)
+
+    # MiB on the command line
+    memory_budget = args.memory_budget
+    if memory_budget is not None:
+        memory_budget <<= 20
+
+    # shrink the target until the mapping stage fits the budget, the first
+    # run calibrates the solver on the largest mesh
+    targetfacenum = resolve_targetfacenum(
+        args.targetfacenum,
+        memory_budget=memory_budget,
+        time_budget=args.time_budget,
+        fpath_obj=max(fpaths, key=lambda f: f.stat().st_size),
+        solver=args.solver,
+    )
+
+    # pyramid levels above the budgeted target are clamped to it
+    levels = args.levels
+    if levels:
+        levels = sorted({min(level, targetfacenum) for level in levels}, reverse=True)
+
+    print(f"Decimating to {levels or targetfacenum} faces")
+
+    qecd_many(
+        fpaths,
+        targetfacenum=targetfacenum,
+        workers=args.workers,
+        levels=levels,
+        cut_variants=args.cut_variants,
+    )
@@ -6,12 +6,8 @@
 #     python3 quadric_edge_collapse_decimation/qecd.py data/source.obj data/
 #     python3 quadric_edge_collapse_decimation/qecd.py data/target.obj data/
 # fi
-for f in data/boundary/*source.obj; do
-    echo "Running QECD on source obj $f"
-    python3 quadric_edge_collapse_decimation/qecd.py $f;
-done
-
-for f in data/boundary/*target.obj; do
-    echo "Running QECD on target obj $f"
-    python3 quadric_edge_collapse_decimation/qecd.py $f;
-done
\ No newline at end of file
+# decimate every source then every target variant in one process. Each
+# boundary is decimated once and its variants (one chunk removed) are cut
+# out of that, so they share vertices with it in the mapping stage
+echo "Running QECD on source and target objs in data/boundary"
+python3 quadric_edge_collapse_decimation/qecd.py --cut_variants data/boundary/*source.obj data/boundary/*target.obj
@@ -1,5 +1,20 @@
 
 
+# `run_harmonic_map.sh python` maps with the sparse Python solver instead,
+# which needs no build and writes the same output. Each side's boundary
+# variants are mapped by one process. The variants scripts/qecd.sh cut out
+# of their parent's decimation (qecd.py --cut_variants) reuse its cotangent
+# weights, but each is still solved on its own. Variants decimated on their
+# own, e.g. by main.py --qecd, share nothing.
+if [[ "$1" == "python" ]]
+then
+    echo -e 'Mapping source...'
+    python3 HarmonicMap/sparse_map.py -v data/mapped data/collapsed/*source.obj
+    echo -e 'Mapping target...'
+    python3 HarmonicMap/sparse_map.py -v data/mapped data/collapsed/*target.obj
+    exit 0
+fi
+
 # check the bin directory for the executable.
 # The executable name is the same as in line 22 of
 # optimization/HarmonicMap/harmonic_map/CMakeLists.txt